@@ -0,0 +1,254 @@
+"""
+Precomputed L and P polynomials of the small diagrams, the leaves of the skein
+trees.
+
+The table maps the canonical form (see `SGCode.canonical`, with the symmetries
+of each polynomial) of the sub-diagrams with up to `MAX_CROSSINGS` crossings met
+while computing the KnotInfo knots and links to their polynomials, under the
+same namespaces and encodings as the persistent cache. It is generated by
+running this module and shipped as the compact binary file `base_table.bin`:
+
+    uv run base_table.py --max-crossings 5
+
+The file is loaded lazily on the first lookup and is ignored if it was written
+for another version of the canonical form, see `persistent_cache.SCHEMA_VERSION`.
+"""
+
+import argparse
+import os
+import io
+import struct
+import tempfile
+import zlib
+
+from array import array
+from codes import SGCode
+from laurent import LaurentPolynomial
+from persistent_cache import SCHEMA_VERSION, encode_link
+
+
+MAGIC = b'SKBT'
+
+# magic, schema version of the canonical form, number of namespaces, number of entries
+HEADER = struct.Struct('<4sIII')
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'base_table.bin')
+
+MAX_CROSSINGS = 5
+
+
+def write_table(path: str, entries: dict[tuple[str, bytes], LaurentPolynomial]):
+    """
+    Write the table file: the header, then compressed with zlib the namespaces
+    as length-prefixed UTF-8 strings and for each entry the index of its
+    namespace, the length of its key, the number of terms, the key and the
+    terms as int64 triples.
+    """
+    namespaces = sorted({namespace for namespace, _ in entries})
+    index = {namespace: k for k, namespace in enumerate(namespaces)}
+
+    body = io.BytesIO()
+    for namespace in namespaces:
+        data = namespace.encode()
+        body.write(struct.pack('<H', len(data)) + data)
+
+    for (namespace, key), p in sorted(entries.items()):
+        terms = array('q')
+        for (i, j), c in sorted(p.terms.items()):
+            terms.extend((i, j, c))
+
+        body.write(struct.pack('<HII', index[namespace], len(key), len(p.terms)))
+        body.write(key)
+        body.write(terms.tobytes())
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, SCHEMA_VERSION, len(namespaces), len(entries)))
+        file.write(zlib.compress(body.getvalue(), 9))
+
+
+def read_table(path: str) -> dict[tuple[str, bytes], LaurentPolynomial] | None:
+    """
+    Read a table file, `None` if it is missing or of another version.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version, n_namespaces, n_entries = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != SCHEMA_VERSION:
+        return None
+
+    data = zlib.decompress(data[HEADER.size:])
+    offset = 0
+    namespaces = []
+    for _ in range(n_namespaces):
+        length, = struct.unpack_from('<H', data, offset)
+        namespaces.append(data[offset + 2:offset + 2 + length].decode())
+        offset += 2 + length
+
+    entries = {}
+    for _ in range(n_entries):
+        namespace, key_length, n_terms = struct.unpack_from('<HII', data, offset)
+        offset += 10
+
+        key = data[offset:offset + key_length]
+        offset += key_length
+
+        terms = array('q')
+        terms.frombytes(data[offset:offset + 24 * n_terms])
+        offset += 24 * n_terms
+
+        entries[(namespaces[namespace], key)] = LaurentPolynomial({
+            (terms[k], terms[k + 1]): terms[k + 2]
+            for k in range(0, len(terms), 3)
+        })
+
+    return entries
+
+
+class BaseTable:
+    """
+    A read-only store over the table file, used by `polynomial_wrapper` like
+    the other external stores (see `polynomial_commons.external_stores`).
+    """
+
+    # the wrapper does not write to read-only stores
+    read_only = True
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._entries: dict[tuple[str, bytes], LaurentPolynomial] | None = None
+        self.max_crossings = MAX_CROSSINGS
+
+    def _load(self) -> dict[tuple[str, bytes], LaurentPolynomial]:
+        if self._entries is None:
+            self._entries = read_table(self.path) or {}
+            self.max_crossings = max(
+                (_crossings(key) for _, key in self._entries), default=0
+            )
+
+        return self._entries
+
+    def get(self, namespace: str, link: SGCode) -> LaurentPolynomial | None:
+        entries = self._load()
+        if link.crossings_count() > self.max_crossings:
+            return None
+
+        return entries.get((namespace, encode_link(link)))
+
+    def put(self, namespace: str, link: SGCode, value: LaurentPolynomial):
+        pass
+
+    def __len__(self):
+        return len(self._load())
+
+
+def _crossings(key: bytes) -> int:
+    values = array('i')
+    values.frombytes(key)
+    # the number of components, then a length per component and two values per
+    # crossing, every crossing appears twice
+    return (len(values) - 1 - values[0]) // 4
+
+
+_table: BaseTable | None = BaseTable()
+
+
+def get_table() -> BaseTable | None:
+    """
+    The table of the process, `None` if it was disabled.
+    """
+    return _table
+
+
+def configure(path: str | None):
+    """
+    Use the table file at `path`, `None` disables the table.
+    """
+    global _table
+    _table = None if path is None else BaseTable(path)
+
+
+def generate(path: str, max_crossings: int, max_source_crossings: int):
+    """
+    Compute L and P for the KnotInfo knots and links with up to
+    `max_source_crossings` crossings and write the sub-diagrams with up to
+    `max_crossings` crossings to the table at `path`.
+    """
+    import database_knotinfo
+    import persistent_cache
+    import sqlite3
+    import utils
+
+    from codes import PDCode
+    from homfly import homfly_polynomial
+    from kauffman import kauffman_polynomial
+
+    utils.global_debug = False
+    configure(None)
+
+    entries = {}
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'table.sqlite')
+        persistent_cache.configure(db_path)
+
+        diagrams = (
+            database_knotinfo.link_list()[2:]
+            + database_knotinfo.link_list(proper_links=True)[2:]
+        )
+        for entry in diagrams:
+            if int(entry['crossing_number']) > max_source_crossings:
+                continue
+
+            if 'pd_notation' in entry:
+                pd = utils.parse_nested_list(entry['pd_notation'], paren_spec="[[]]")
+            else:
+                pd = utils.parse_nested_list(entry['pd_notation_vector'], paren_spec="{{}}")
+
+            link = PDCode.from_tuples(pd).to_signed_gauss_code()
+            kauffman_polynomial(link)
+            homfly_polynomial(link)
+
+        persistent_cache.configure(None)
+
+        connection = sqlite3.connect(db_path)
+        for namespace, key, value in connection.execute(
+            "SELECT namespace, key, value FROM entries"
+        ):
+            if _crossings(key) <= max_crossings:
+                entries[(namespace, key)] = persistent_cache.decode_polynomial(value)
+        connection.close()
+
+    write_table(path, entries)
+    return entries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate the table of the polynomials of the small diagrams."
+    )
+    parser.add_argument(
+        '--max-crossings',
+        type=int,
+        default=MAX_CROSSINGS,
+        help=f"Largest sub-diagrams in the table, {MAX_CROSSINGS} by default",
+    )
+    parser.add_argument(
+        '--source-crossings',
+        type=int,
+        default=10,
+        help="Largest KnotInfo diagrams computed to collect the sub-diagrams, 10 by default",
+    )
+    parser.add_argument(
+        '--output',
+        default=DEFAULT_PATH,
+        help=f"Path of the table, the default is '{DEFAULT_PATH}'",
+    )
+    args = parser.parse_args()
+
+    # the recursions look the table up through the imported module, not this one
+    import base_table
+    entries = base_table.generate(args.output, args.max_crossings, args.source_crossings)
+    print(f"Wrote {len(entries)} entries to {args.output}")
@@ -0,0 +1,58 @@
+import base_table
+import pytest
+
+from base_table import BaseTable, read_table, write_table
+from codes import PDCode
+from homfly import homfly_polynomial
+from kauffman import kauffman_polynomial
+from laurent import LaurentPolynomial
+from persistent_cache import encode_link
+from skein_cache import call_count, clear_caches
+
+
+pytestmark = pytest.mark.base_table
+
+
+# 7_7
+K7_7 = PDCode.from_tuples([
+    (1, 4, 2, 5), (5, 10, 6, 11), (3, 9, 4, 8), (9, 3, 10, 2),
+    (13, 7, 14, 6), (11, 1, 12, 14), (7, 13, 8, 12)
+]).to_signed_gauss_code()
+
+
+def test_roundtrip(tmp_path):
+    path = str(tmp_path / 'table.bin')
+    entries = {
+        ('ns.a', encode_link(K7_7)): LaurentPolynomial({(1, -2): 3, (-4, 0): -1}),
+        ('ns.b', encode_link(K7_7)): LaurentPolynomial({(0, 0): 1}),
+    }
+    write_table(path, entries)
+
+    assert read_table(path) == entries
+    assert BaseTable(path).get('ns.a', K7_7) == entries[('ns.a', encode_link(K7_7))]
+    assert BaseTable(path).get('ns.c', K7_7) is None
+    assert read_table(str(tmp_path / 'missing.bin')) is None
+
+
+def test_shipped_table():
+    table = BaseTable()
+    assert len(table) > 0
+    assert table.max_crossings == base_table.MAX_CROSSINGS
+
+
+def test_table_agrees_with_recursion():
+    base_table.configure(None)
+    clear_caches()
+    expected = (kauffman_polynomial(K7_7), homfly_polynomial(K7_7))
+
+    base_table.configure(base_table.DEFAULT_PATH)
+    clear_caches()
+    start = call_count()
+    assert (kauffman_polynomial(K7_7), homfly_polynomial(K7_7)) == expected
+    calls = call_count() - start
+
+    base_table.configure(None)
+    clear_caches()
+    start = call_count()
+    kauffman_polynomial(K7_7), homfly_polynomial(K7_7)
+    assert calls < call_count() - start
@@ -2,14 +2,22 @@ from codes import SGCode, PDCode
 
 from homfly import homfly_polynomial
 from kauffman import f_polynomial
+from skein_cache import CacheStats
 
 from sympy import Poly, parse_expr, symbols, init_printing
 
 from utils import parse_nested_list
+from polynomial_commons import BACKENDS
 from contextlib import redirect_stdout
 
 import database_knotinfo
+import homfly
+import kauffman
+import persistent_cache
+import shared_cache
+import atexit
 import io
+import functools
 import time
 import argparse
 import concurrent.futures
@@ -27,6 +35,12 @@ AVAILABLE_POLYNOMIALS = {
     'kauffman': (f_polynomial, "kauffman_polynomial"),
 }
 
+# The cache statistics of the recursion behind each polynomial
+CACHE_STATS = {
+    'homfly': homfly.cache_stats,
+    'kauffman': kauffman.cache_stats,
+}
+
 
 def process_polynomial(sg: SGCode, p_expected: Poly, poly_func) -> tuple[bool, Poly, float]:
     """
@@ -91,11 +105,17 @@ def print_result(
         print(f"{prefix}> {p_expected}")
 
 
-def process_entry_worker(queue, index, knotinfo_entry, is_link, poly_func, poly_db_key, poly_name_for_display):
+def process_entry_worker(queue, index, knotinfo_entry, is_link, poly_func, poly_db_key, poly_name_for_display, stats_func=None) -> CacheStats | None:
     """
     Worker function to process a single knot/link entry.
     To be run in a ProcessPoolExecutor.
+
+    With `stats_func` it returns the cache statistics of this entry, the
+    workers keep their caches between entries so they are the difference of
+    two snapshots, and the sum over all the entries is the total of the sweep.
     """
+    stats_before = stats_func() if stats_func is not None else None
+
     name = knotinfo_entry['name']
     pd_code_key = 'pd_notation_vector' if is_link else 'pd_notation'
     pd_code_str = knotinfo_entry[pd_code_key]
@@ -114,6 +134,18 @@ def process_entry_worker(queue, index, knotinfo_entry, is_link, poly_func, poly_
     queue.put((index, name, matches, p_actual, p_expected,
               sg, pd, bench_time, poly_name_for_display))
 
+    if stats_func is not None:
+        return stats_func() - stats_before
+
+
+def init_worker(cache_db: str | None, shared_name: str | None, shared_lock):
+    """
+    Initializer of the worker processes, attaches them to the persistent and
+    shared caches of the sweep.
+    """
+    persistent_cache.configure(cache_db)
+    shared_cache.attach(shared_name, shared_lock)
+
 
 def result_processor_thread_func(queue, num_items_to_process, original_total_for_display, first_original_idx_processed):
     """
@@ -170,6 +202,34 @@ if __name__ == "__main__":
         default="kauffman",
         help=f"Polynomial type: {', '.join(AVAILABLE_POLYNOMIALS.keys())}, the default is the Kauffman F polynomial",
     )
+    parser.add_argument(
+        '--backend',
+        choices=list(BACKENDS.keys()),
+        default="laurent",
+        help="Polynomial arithmetic backend used by the recursion, the default is 'laurent'",
+    )
+    parser.add_argument(
+        '--cache-db',
+        nargs='?',
+        const=persistent_cache.DEFAULT_PATH,
+        default=None,
+        metavar='PATH',
+        help=f"Share sub-diagram results between workers and runs through an SQLite file, the default path is '{persistent_cache.DEFAULT_PATH}'",
+    )
+    parser.add_argument(
+        '--shared-cache',
+        nargs='?',
+        type=int,
+        const=256,
+        default=None,
+        metavar='MB',
+        help="Share sub-diagram results between the workers through a shared memory cache of the given size, 256 MB by default",
+    )
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help="Show the hits and misses of the caches by sub-diagram crossings and recursion depth, summed over the workers",
+    )
     parser.add_argument(
         '--knots',
         action='store_true',
@@ -194,6 +254,10 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     selected_poly_func, selected_poly_db_key = AVAILABLE_POLYNOMIALS[args.polynomial]
+    # workers are separate processes, so the backend is bound to the function
+    selected_poly_func = functools.partial(
+        selected_poly_func, backend=args.backend
+    )
     # Use the database key as the name for display, or derive a more friendly one if needed
     poly_name_for_display = selected_poly_db_key
 
@@ -205,6 +269,23 @@ if __name__ == "__main__":
 
     manager = multiprocessing.Manager()
 
+    shared = None
+    shared_lock = None
+    if args.shared_cache is not None:
+        shared_lock = multiprocessing.Lock()
+        shared = shared_cache.SharedCache(
+            size=args.shared_cache * 1024 * 1024, lock=shared_lock, create=True
+        )
+        # the segment outlives the workers, the parent removes it at exit
+        atexit.register(shared.unlink)
+
+    worker_init_args = (
+        args.cache_db, shared.name if shared is not None else None, shared_lock
+    )
+
+    stats_func = CACHE_STATS[args.polynomial] if args.cache_stats else None
+    stats_futures = []
+
     if args.knots:
         knots_list_full = database_knotinfo.link_list()[2:]
 
@@ -242,13 +323,17 @@ if __name__ == "__main__":
             )
             result_thread.start()
 
-            with concurrent.futures.ProcessPoolExecutor() as executor:
+            with concurrent.futures.ProcessPoolExecutor(
+                initializer=init_worker,
+                initargs=worker_init_args,
+            ) as executor:
                 for original_idx, entry_data in tasks_to_submit:
-                    executor.submit(
+                    stats_futures.append(executor.submit(
                         process_entry_worker,
                         results_queue, original_idx, entry_data, False,
-                        selected_poly_func, selected_poly_db_key, poly_name_for_display
-                    )
+                        selected_poly_func, selected_poly_db_key, poly_name_for_display,
+                        stats_func
+                    ))
 
             result_thread.join()
         elif original_total_count > 0:
@@ -291,14 +376,25 @@ if __name__ == "__main__":
             )
             result_thread.start()
 
-            with concurrent.futures.ProcessPoolExecutor() as executor:
+            with concurrent.futures.ProcessPoolExecutor(
+                initializer=init_worker,
+                initargs=worker_init_args,
+            ) as executor:
                 for original_idx, entry_data in tasks_to_submit:
-                    executor.submit(
+                    stats_futures.append(executor.submit(
                         process_entry_worker,
                         results_queue, original_idx, entry_data, True,
-                        selected_poly_func, selected_poly_db_key, poly_name_for_display
-                    )
+                        selected_poly_func, selected_poly_db_key, poly_name_for_display,
+                        stats_func
+                    ))
 
             result_thread.join()
         elif original_total_count > 0:
             print("All links skipped.")
+
+    if args.cache_stats:
+        total_stats = sum(
+            (future.result() for future in stats_futures), CacheStats()
+        )
+        print("Cache statistics:")
+        print(total_stats.format())
@@ -5,6 +5,9 @@ import re
 
 import kauffman
 import homfly
+import polynomial_commons
+import persistent_cache
+import skein_cache
 
 from typing import Callable
 from codes import SGCode, PDCode
@@ -23,6 +26,13 @@ AVAILABLE_POLYNOMIALS: dict[str, tuple[str, Callable[[SGCode], Poly], str | None
     "L": ("Kauffman L Polynomial", kauffman.kauffman_polynomial, None),
 }
 
+# The cache statistics of the recursion behind each polynomial
+CACHE_STATS = {
+    "P": homfly.cache_stats,
+    "F": kauffman.cache_stats,
+    "L": kauffman.cache_stats,
+}
+
 
 z = symbols("z")
 all_diagrams = []
@@ -147,6 +157,33 @@ Examples:
         default="F",
         help=f"Polynomial to compute: {', '.join(AVAILABLE_POLYNOMIALS.keys())}. Default is 'F' (Kauffman F polynomial).",
     )
+    parser.add_argument(
+        '--backend',
+        choices=list(polynomial_commons.BACKENDS.keys()),
+        default="laurent",
+        help="Polynomial arithmetic backend used by the recursion. Default is 'laurent'.",
+    )
+    parser.add_argument(
+        '--cache-db',
+        nargs='?',
+        const=persistent_cache.DEFAULT_PATH,
+        default=None,
+        metavar='PATH',
+        help=f"Reuse sub-diagram results stored in an SQLite file across runs. Default path is '{persistent_cache.DEFAULT_PATH}'.",
+    )
+    parser.add_argument(
+        '--spill-dir',
+        nargs='?',
+        const=skein_cache.DEFAULT_SPILL_DIR,
+        default=None,
+        metavar='DIR',
+        help=f"Move the sub-diagram results evicted from the memory caches to a log in DIR instead of dropping them. Default directory is '{skein_cache.DEFAULT_SPILL_DIR}'.",
+    )
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help="Show the hits and misses of the caches by sub-diagram crossings and recursion depth",
+    )
     parser.add_argument(
         '--no-color',
         action='store_true',
@@ -175,6 +212,9 @@ Examples:
         Fore = Back = Style = _DummyColor()
 
     utils.global_debug = args.debug
+    polynomial_commons.set_default_backend(args.backend)
+    persistent_cache.configure(args.cache_db)
+    skein_cache.spill_caches(args.spill_dir)
 
     poly_name, poly_fn, poly_label = AVAILABLE_POLYNOMIALS[args.polynomial]
 
@@ -376,6 +416,11 @@ Examples:
                 f"  {Style.BRIGHT}No reference polynomial available for verification{Style.RESET_ALL}"
             )
 
+    if args.cache_stats:
+        print_section("Cache Statistics")
+        for line in CACHE_STATS[args.polynomial]().format().splitlines():
+            print(f"  {line}")
+
     print_header("Computation Complete")
 
 
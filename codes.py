@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-from typing import Literal, Iterable
+import functools
 
+from typing import Literal, Iterable, Sequence
+
+from array import array
 from dataclasses import dataclass
 
 import graphs
 from graphs import Graph, collapse_loops, find_roots, find_disjoint_loops
 
-from utils import sorted_tuple, rotate_to_minimal, sign_str, depth_print
+from utils import sorted_tuple, rotate_to_minimal, least_rotations, sign_str, depth_print
 
 
 from warnings import deprecated
@@ -54,11 +57,59 @@ class PDCodeCrossing:
             return -1
 
 
-@dataclass(frozen=True)
+def crossing_value(id: int, over_under: Sign, handedness: Sign) -> int:
+    """
+    A crossing as a single int, `4 * id + 2 * over + left`. Values compare like
+    the tuples `(id, over_under, handedness)`, and the switch, the opposite and
+    the flipped handedness of a crossing are `value ^ 3`, `value ^ 2` and
+    `value ^ 1`.
+    """
+    return 4 * id + 2 * (over_under == CROSSING_OVER) + (handedness == HANDED_LEFT)
+
+
+_interned_crossings: dict[int, SGCodeCrossing] = {}
+
+
+@dataclass(frozen=True, slots=True, init=False, eq=False)
 class SGCodeCrossing:
+    """
+    Crossings are interned: there is a single instance for each id, over/under
+    and handedness, so the transforms below allocate nothing and crossings
+    compare and hash by identity. `value` is the `crossing_value` of the
+    crossing.
+    """
     id: int
     over_under: Sign
     handedness: Sign
+    value: int
+
+    def __new__(cls, id: int, over_under: Sign, handedness: Sign) -> SGCodeCrossing:
+        value = crossing_value(id, over_under, handedness)
+        crossing = _interned_crossings.get(value)
+        if crossing is None:
+            crossing = object.__new__(cls)
+            object.__setattr__(crossing, 'id', id)
+            object.__setattr__(crossing, 'over_under', over_under)
+            object.__setattr__(crossing, 'handedness', handedness)
+            object.__setattr__(crossing, 'value', value)
+            _interned_crossings[value] = crossing
+
+        return crossing
+
+    @staticmethod
+    def from_value(value: int) -> SGCodeCrossing:
+        crossing = _interned_crossings.get(value)
+        if crossing is None:
+            crossing = SGCodeCrossing(
+                value >> 2,
+                CROSSING_OVER if value & 2 else CROSSING_UNDER,
+                HANDED_LEFT if value & 1 else HANDED_RIGHT,
+            )
+
+        return crossing
+
+    def __reduce__(self):
+        return SGCodeCrossing, (self.id, self.over_under, self.handedness)
 
     def is_over(self) -> bool:
         return self.over_under == CROSSING_OVER
@@ -76,19 +127,19 @@ class SGCodeCrossing:
         """
         Return the opposite crossing with same id and handedness.
         """
-        return SGCodeCrossing(self.id, -self.over_under, self.handedness)
+        return SGCodeCrossing.from_value(self.value ^ 2)
 
     def switch(self) -> SGCodeCrossing:
         """
         Return the crossing with same id and opposite over/under, this also flips the handedness.
         """
-        return SGCodeCrossing(self.id, -self.over_under, -self.handedness)
+        return SGCodeCrossing.from_value(self.value ^ 3)
 
     def flip_handedness(self) -> SGCodeCrossing:
         """
         Return the crossing with same id and opposite handedness.
         """
-        return SGCodeCrossing(self.id, self.over_under, -self.handedness)
+        return SGCodeCrossing.from_value(self.value ^ 1)
 
     def __str__(self):
         return f"{sign_str(self.over_under)}{self.id}{sign_str(self.handedness, mode='sup')}"
@@ -102,10 +153,169 @@ class SGCodeCrossing:
         return (-self.over_under, self.id) < (-other.over_under, other.id)
 
 
+def crossing_masks(values: Iterable[int]) -> tuple[int, int]:
+    """
+    The ids of the over and of the under crossings among the given crossing
+    values, as bitmasks with the bit `1 << id` set for each id.
+    """
+    over = under = 0
+    for value in values:
+        if value & 2:
+            over |= 1 << (value >> 2)
+        else:
+            under |= 1 << (value >> 2)
+
+    return over, under
+
+
+def canonical_values(components: list[Sequence[int]], max_candidates: int = 64) -> list[list[int]]:
+    """
+    The canonical labelling of `SGCode.canonical` for components given as
+    crossing values. The local codes, rotations and encodings are all plain
+    ints, ordered like the tuples they stand for.
+    """
+    signatures = []
+    for component in components:
+        # the over/under and handedness of each crossing and the distance to
+        # the other occurrence of self-crossings
+        n = len(component)
+        code = [(value & 3) * n for value in component]
+        first: dict[int, int] = {}
+        for k, value in enumerate(component):
+            j = first.pop(value >> 2, None)
+            if j is None:
+                first[value >> 2] = k
+            else:
+                code[j] += k - j
+                code[k] += n + j - k
+
+        rotations = least_rotations(code)
+        signatures.append((
+            (n, code[rotations[0]:] + code[:rotations[0]]),
+            rotations,
+        ))
+
+    order = sorted(
+        range(len(components)),
+        key=lambda i: signatures[i][0]
+    )
+
+    # a state is (encoding so far, placed component indices, id mapping)
+    states: list[tuple[list, tuple[int, ...], dict[int, int]]] = [([], (), {})]
+
+    for slot in order:
+        slot_signature = signatures[slot][0]
+
+        best = None
+        next_states = []
+        for encoding, placed, id_mapping in states:
+            for i in order:
+                if i in placed or signatures[i][0] != slot_signature:
+                    continue
+
+                component = components[i]
+                for r in signatures[i][1]:
+                    mapping = dict(id_mapping)
+                    encoded = []
+                    for value in component[r:] + component[:r]:
+                        id = mapping.get(value >> 2)
+                        if id is None:
+                            id = mapping[value >> 2] = len(mapping) + 1
+                        encoded.append(4 * id + (value & 3))
+
+                    if best is None or encoded < best:
+                        best = encoded
+                        next_states = []
+                    if encoded == best and len(next_states) < max_candidates:
+                        next_states.append(
+                            (encoding + [encoded], placed + (i,), mapping)
+                        )
+
+        states = next_states
+
+    encoding, _, _ = states[0]
+    return encoding
+
+
+def normalized_values(components: list[Sequence[int]]) -> list[list[int]]:
+    """
+    Rotate each component to its least crossing, over crossings first and then
+    by id (see `SGCodeCrossing.__lt__`), and relabel the crossings as
+    `SGCode.relabel`.
+    """
+    rotated = []
+    for component in components:
+        if len(component) > 0:
+            k = min(range(len(component)), key=lambda k: (~component[k] & 2, component[k] >> 2))
+            component = component[k:] + component[:k]
+        rotated.append(component)
+
+    crossing_ids = {value >> 2 for component in rotated for value in component}
+    id_mapping = {
+        old_id: new_id
+        for new_id, old_id in enumerate(crossing_ids, start=1)
+    }
+
+    return [
+        [4 * id_mapping[value >> 2] + (value & 3) for value in component]
+        for component in rotated
+    ]
+
+
 @dataclass(frozen=True)
 class SGCode:
     components: list[list[SGCodeCrossing]]
 
+    # The packed encoding of the components (see `pack`) and its hash are
+    # computed once, on first use: codes are the keys of the memos of the
+    # recursions, so they are hashed and compared all the time, while many
+    # intermediate codes never are. The components must not be modified after
+    # construction, diagrams derived from each other share the components they
+    # have in common.
+
+    @functools.cached_property
+    def packed(self) -> bytes:
+        return SGCode.pack(self.components)
+
+    @functools.cached_property
+    def _hash(self) -> int:
+        return hash(self.packed)
+
+    @functools.cached_property
+    def crossing_index(self) -> dict[int, tuple[tuple[int, int, SGCodeCrossing], ...]]:
+        """
+        For each crossing id its two occurrences, in order, as the index of the
+        component, the position in the component and the crossing.
+        """
+        first: dict[int, tuple[int, int, SGCodeCrossing]] = {}
+        index: dict[int, tuple[tuple[int, int, SGCodeCrossing], ...]] = {}
+        for i, component in enumerate(self.components):
+            for j, crossing in enumerate(component):
+                if crossing.id in first:
+                    index[crossing.id] = (first.pop(crossing.id), (i, j, crossing))
+                else:
+                    first[crossing.id] = (i, j, crossing)
+
+        return index
+
+    @staticmethod
+    def pack(components: list[list[SGCodeCrossing]]) -> bytes:
+        """
+        The number of components, then for each component its length followed
+        by its crossings as signed ids (negative for under) and handedness, as
+        native 32-bit integers.
+        """
+        values = [len(components)]
+        for component in components:
+            values.append(len(component))
+            values += [
+                value
+                for crossing in component
+                for value in (crossing.id * crossing.over_under, crossing.handedness)
+            ]
+
+        return array('i', values).tobytes()
+
     def __str__(self):
         return f"{self.components}"
 
@@ -113,10 +323,17 @@ class SGCode:
         return f"{self.components}"
 
     def __hash__(self):
-        return hash(tuple(
-            tuple(crossing.id for crossing in component)
-            for component in self.components
-        ))
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SGCode):
+            return NotImplemented
+
+        return self is other or (self._hash == other._hash and self.packed == other.packed)
+
+    def __reduce__(self):
+        # the hash of bytes is salted per process, it is computed again
+        return SGCode, (self.components,)
 
     def relabel(self):
         """
@@ -151,6 +368,46 @@ class SGCode:
             for component in self.components
         ])
 
+    def values(self) -> list[list[int]]:
+        """
+        The components as lists of crossing values, see `crossing_value`.
+        """
+        return [[crossing.value for crossing in component] for component in self.components]
+
+    @staticmethod
+    def from_values(components: Iterable[Iterable[int]]) -> SGCode:
+        return SGCode([
+            [SGCodeCrossing.from_value(value) for value in component]
+            for component in components
+        ])
+
+    def canonical(self, max_candidates: int = 64) -> SGCode:
+        """
+        Return a canonical labelling of the diagram: the lexicographically least
+        encoding over the rotations of each component, the orderings of the
+        components and the relabellings of the crossings in order of first
+        appearance. Diagrams that only differ by these choices get equal codes,
+        so they share their cache entries.
+
+        Each component first gets a rotation-invariant local code, made of the
+        over/under and handedness of each crossing and the distance to the
+        other occurrence of self-crossings. Components are sorted by their least
+        local code (Booth's algorithm) and only the rotations realizing it are
+        candidates. The remaining ties are broken by building the encoding one
+        component at a time, keeping every state with a least prefix, at most
+        `max_candidates` of them (beyond that the result is still a valid
+        diagram, just not guaranteed canonical).
+
+        See `canonical_values`, that works on the crossing values.
+        """
+        return SGCode.from_values(canonical_values(self.values(), max_candidates))
+
+    def normalized(self) -> SGCode:
+        """
+        Same as `to_minimal()` followed by `relabel()`, in a single pass.
+        """
+        return SGCode.from_values(normalized_values(self.values()))
+
     def writhe(self):
         """
         Calculate the writhe of the signed Gauss code.
@@ -162,6 +419,9 @@ class SGCode:
             for c in component
         ) // 2
 
+    def components_count(self) -> int:
+        return len(self.components)
+
     def crossings_count(self) -> int:
         """
         Count the number of crossings in the signed Gauss code.
@@ -233,21 +493,13 @@ class SGCode:
         ])
 
     def connected_components(self) -> list[list[int]]:
-        crossing_indices = {
-            crossing: (i, j)
-            for i, component in enumerate(self.components)
-            for j, crossing in enumerate(component)
-        }
-
         component_adj: list[set[int]] = [
             set() for _ in range(len(self.components))
         ]
 
-        for i1, component in enumerate(self.components):
-            for j1, crossing in enumerate(component):
-                over_crossing = crossing.opposite()
-                i2, _ = crossing_indices[over_crossing]
-                component_adj[i1].add(i2)
+        for (i1, _, _), (i2, _, _) in self.crossing_index.values():
+            component_adj[i1].add(i2)
+            component_adj[i2].add(i1)
 
         return graphs.connected_components(
             get_vertices=lambda: range(len(self.components)),
@@ -256,25 +508,18 @@ class SGCode:
 
     def overlies_decomposition(self) -> list[list[int]]:
         # graph where "i -> j" iff "i overlies j"
-        graph_of_overlies: Graph[int] = {}
-
-        crossing_indices = {
-            crossing: (i, j)
-            for i, component in enumerate(self.components)
-            for j, crossing in enumerate(component)
+        graph_of_overlies: Graph[int] = {
+            i: set() for i in range(len(self.components))
         }
 
-        for i1, component in enumerate(self.components):
-            graph_of_overlies[i1] = set()
-            for j1, crossing in enumerate(component):
-                over_crossing = crossing.opposite()
-
-                i2, _ = crossing_indices[over_crossing]
-                if i1 == i2:
-                    continue
+        for (i1, _, crossing), (i2, _, _) in self.crossing_index.values():
+            if i1 == i2:
+                continue
 
-                if crossing.is_over():
-                    graph_of_overlies[i1].add(i2)
+            if crossing.is_over():
+                graph_of_overlies[i1].add(i2)
+            else:
+                graph_of_overlies[i2].add(i1)
 
         roots = find_roots(graph_of_overlies)
 
@@ -399,28 +644,15 @@ class SGCode:
         Split the component at index i into K_i and K - K_i
         """
 
-        target_all_ids = set(
-            crossing.id
-            for crossing in self.components[i]
-        )
-
-        target_own_ids = set(
-            crossing.id
-            for crossing in self.components[i]
-            if crossing.is_over()
-        ).intersection(
-            set(
-                crossing.id
-                for crossing in self.components[i]
-                if crossing.is_under()
-            )
-        )
+        over, under = crossing_masks(crossing.value for crossing in self.components[i])
+        target_all_ids = over | under
+        target_own_ids = over & under
 
         component_i_without_others = SGCode([
             [
                 crossing
                 for crossing in self.components[i]
-                if crossing.id in target_own_ids
+                if target_own_ids >> crossing.id & 1
             ]
         ])
 
@@ -428,7 +660,7 @@ class SGCode:
             [
                 crossing
                 for crossing in self.components[j]
-                if crossing.id not in target_all_ids
+                if not target_all_ids >> crossing.id & 1
             ]
             for j in range(len(self.components))
             if j != i
@@ -446,26 +678,19 @@ class SGCode:
         """
         Extract a sublink from the original link based on a subset of given component IDs.
         """
-        own_crossings = set(
-            crossing.id
+        over, under = crossing_masks(
+            crossing.value
             for i in component_ids
             for crossing in self.components[i]
-            if crossing.is_over()
-        ).intersection(
-            set(
-                crossing.id
-                for i in component_ids
-                for crossing in self.components[i]
-                if crossing.is_under()
-            )
         )
+        own_crossings = over & under
 
         return SGCode(
             [
                 [
                     c
                     for c in self.components[i]
-                    if c.id in own_crossings
+                    if own_crossings >> c.id & 1
                 ]
                 for i in component_ids
             ]
@@ -475,40 +700,35 @@ class SGCode:
         self, switching_sequence: list[int]
     ) -> SGCode:
         """
-        Apply a switching sequence to the signed Gauss code.
+        Apply a switching sequence to the signed Gauss code, the components that
+        have none of its crossings are shared with this diagram.
         :param switching_sequence: Switching sequence
         :return: Signed Gauss code
         """
+        switched = set(switching_sequence)
+        touched = {
+            i
+            for id in switched
+            for i, _, _ in self.crossing_index.get(id, ())
+        }
+
         return SGCode([
             [
                 crossing.switch()
-                if crossing.id in switching_sequence else crossing
+                if crossing.id in switched else crossing
                 for crossing in component
-            ]
-            for component in self.components
+            ] if i in touched else component
+            for i, component in enumerate(self.components)
         ])
 
     def get_crossing_handedness(self, id: int) -> Sign:
-        crossing_indices = [
-            (i, j, crossing)
-            for i, component in enumerate(self.components)
-            for j, crossing in enumerate(component)
-            if crossing.id == id
-        ]
+        (_, _, c1), (_, _, c2) = self.crossing_index[id]
+        assert c1.handedness == c2.handedness
 
-        assert len(crossing_indices) == 2
-        assert len(set(c.handedness for _, _, c in crossing_indices)) == 1
-
-        _, _, c = crossing_indices[0]
-        return c.handedness
+        return c1.handedness
 
     def get_crossing_indices(self, id: int) -> list[tuple[int, int, SGCodeCrossing]]:
-        crossing_indices = [
-            (i, j, crossing)
-            for i, component in enumerate(self.components)
-            for j, crossing in enumerate(component)
-            if crossing.id == id
-        ]
+        crossing_indices = list(self.crossing_index[id])
 
         assert len(crossing_indices) == 2
         assert len(set(c.handedness for _, _, c in crossing_indices)) == 1
@@ -524,18 +744,24 @@ class SGCode:
         # list and crossing index is the index in the single component list. So
         # to access the original crossing we can do self.components[idx[0]][idx[1]]
         (under_index, under_crossing), (over_index, over_crossing) = sorted_tuple(
-            (
-                ((i, j), crossing)
-                for i, component in enumerate(self.components)
-                for j, crossing in enumerate(component)
-                if crossing.id == id
-            ),
+            (((i, j), crossing) for i, j, crossing in self.crossing_index[id]),
             key=lambda c: c[1].over_under
         )
 
         assert over_crossing.handedness == under_crossing.handedness
 
-        handedness = over_crossing.handedness
+        return self._splice(over_index, under_index, over_crossing.handedness, orthogonal)
+
+    def _splice(
+        self,
+        over_index: tuple[int, int],
+        under_index: tuple[int, int],
+        handedness: Sign,
+        orthogonal: Sign,
+    ) -> SGCode:
+        """
+        The splice of `splice_h` at the crossing with the given occurrences.
+        """
         over_index_component, _ = over_index
         under_index_component, _ = under_index
 
@@ -556,7 +782,7 @@ class SGCode:
 
             if handedness * orthogonal == HANDED_LEFT:
                 return SGCode([
-                    *(component[:]
+                    *(component
                       for i, component in enumerate(self.components)
                       if i != component_index),
                     [
@@ -566,13 +792,12 @@ class SGCode:
                     l2,
                 ])
             else:
-                over_crossing_ids = set(c.id for c in l2 if c.is_over())
-                under_crossing_ids = set(c.id for c in l2 if c.is_under())
+                over_crossing_ids, under_crossing_ids = crossing_masks(c.value for c in l2)
                 non_self_crossing_ids = over_crossing_ids ^ under_crossing_ids
 
                 def update_signs(strand: Iterable[SGCodeCrossing]):
                     return [
-                        c.flip_handedness() if c.id in non_self_crossing_ids else c
+                        c.flip_handedness() if non_self_crossing_ids >> c.id & 1 else c
                         for c in strand
                     ]
 
@@ -599,7 +824,7 @@ class SGCode:
                 # print("splice type +1", (id, handedness, orthogonal))
 
                 return SGCode([
-                    *(component[:]
+                    *(component
                       for i, component in enumerate(self.components)
                       if i != over_index[0] and i != under_index[0]),
                     [
@@ -612,15 +837,10 @@ class SGCode:
             else:
                 # print("splice type -1", (id, handedness, orthogonal))
 
-                non_self_crossing_ids = (
-                    set(c.id for c in m1 if c.is_over())
-                    |
-                    set(c.id for c in m2 if c.is_over())
-                ) ^ (
-                    set(c.id for c in m1 if c.is_under())
-                    |
-                    set(c.id for c in m2 if c.is_under())
+                over_crossing_ids, under_crossing_ids = crossing_masks(
+                    c.value for strand in (m1, m2) for c in strand
                 )
+                non_self_crossing_ids = over_crossing_ids ^ under_crossing_ids
 
                 # non_self_crossing_ids = (
                 #     set(c.id for c in m1) | set(c.id for c in m2)
@@ -644,7 +864,7 @@ class SGCode:
 
                 def update_signs(strand: Iterable[SGCodeCrossing]):
                     return [
-                        c.flip_handedness() if c.id in non_self_crossing_ids else c
+                        c.flip_handedness() if non_self_crossing_ids >> c.id & 1 else c
                         for c in strand
                     ]
 
@@ -665,18 +885,45 @@ class SGCode:
     def splice_v(self, id: int):
         return self.splice_h(id, orthogonal=-1)
 
+    def skein_children(self, id: int) -> tuple[SGCode, SGCode, SGCode]:
+        """
+        The diagrams of a skein step at the crossing with the given id: the
+        diagram with the crossing switched and its horizontal and vertical
+        splices, as `switch_crossing(id)`, `switch_crossing(id).splice_h(id)`
+        and `switch_crossing(id).splice_v(id)`, from a single lookup of the
+        crossing.
+        """
+        (i1, j1, c1), (i2, j2, _) = self.crossing_index[id]
+        switched = self.switch_crossing(id)
+
+        # the switch swaps the over and under occurrences and the handedness
+        if c1.is_over():
+            over_index, under_index = (i2, j2), (i1, j1)
+        else:
+            over_index, under_index = (i1, j1), (i2, j2)
+
+        handedness = -c1.handedness
+        return (
+            switched,
+            switched._splice(over_index, under_index, handedness, +1),
+            switched._splice(over_index, under_index, handedness, -1),
+        )
+
     def switch_crossing(self, id: int):
         """
-        Switches the crossing with the given id.
+        Switches the crossing with the given id. Only the components through
+        the crossing are copied, the new diagram shares the others.
         """
-        return SGCode([
-            [
-                crossing.switch()
-                if crossing.id == id else crossing
-                for crossing in component
-            ]
-            for component in self.components
-        ])
+        (i1, j1, c1), (i2, j2, c2) = self.crossing_index[id]
+
+        components = list(self.components)
+        components[i1] = list(components[i1])
+        if i2 != i1:
+            components[i2] = list(components[i2])
+        components[i1][j1] = c1.switch()
+        components[i2][j2] = c2.switch()
+
+        return SGCode(components)
 
     @staticmethod
     def from_tuples(
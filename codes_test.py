@@ -1,4 +1,18 @@
-from codes import SGCode, PDCode
+import pickle
+
+from codes import SGCode, SGCodeCrossing, PDCode, CROSSING_OVER, CROSSING_UNDER, HANDED_LEFT, HANDED_RIGHT, crossing_masks
+
+
+# a three component link
+LINK_1 = PDCode.from_tuples([
+    (4, 1, 5, 2), (8, 3, 1, 4), (9, 6, 10, 7),
+    (2, 7, 3, 8), (11, 10, 12, 11), (5, 12, 6, 9)
+]).to_signed_gauss_code()
+
+K5_2 = PDCode.from_tuples(
+    [(1, 5, 2, 4), (3, 9, 4, 8), (5, 1, 6, 10), (7, 3, 8, 2), (9, 7, 10, 6)]
+).to_signed_gauss_code()
+
 
 # BUG: for now there is a bug in PDCode.from_tuples when converting
 # curls, so when a 4-tuple has repeated indices
@@ -37,10 +51,7 @@ def test_trefoil_sgc_writhe():
 
 
 def test_link_1_is_std_unknot():
-    link_sgc = PDCode.from_tuples(
-        [(4, 1, 5, 2), (8, 3, 1, 4), (9, 6, 10, 7),
-         (2, 7, 3, 8), (11, 10, 12, 11), (5, 12, 6, 9)]
-    ).to_signed_gauss_code()
+    link_sgc = LINK_1
 
     print(link_sgc)
 
@@ -215,3 +226,119 @@ def test_overlies_decomposition_2():
     component_ids = sg.overlies_decomposition()
 
     assert component_ids == [[0, 1]]
+
+
+def test_canonical():
+    sg = SGCode.from_tuples([
+        [(+1, -1), (+6, +1), (+5, +1), (-3, +1)],
+        [(+4, -1), (-1, -1), (+2, +1), (-5, +1)],
+        [(-6, +1), (-4, -1), (+3, +1), (-2, +1)]
+    ])
+
+    # same diagram with rotated components, reordered components and other ids
+    sg_other = SGCode.from_tuples([
+        [(+30, +1), (-20, +1), (-60, +1), (-40, -1)],
+        [(+10, -1), (+60, +1), (+50, +1), (-30, +1)],
+        [(-50, +1), (+40, -1), (-10, -1), (+20, +1)],
+    ])
+
+    canonical = sg.canonical()
+
+    assert canonical == sg_other.canonical()
+    assert canonical.canonical() == canonical
+    assert canonical.crossings_count() == sg.crossings_count()
+    assert canonical.writhe() == sg.writhe()
+    assert {
+        c.id for component in canonical.components for c in component
+    } == set(range(1, 7))
+
+    # the mirror is a different diagram
+    assert sg.mirror().canonical() != canonical
+
+
+def test_canonical_periodic():
+    # the two components and their rotations are all equivalent
+    sg = SGCode.from_tuples([[(+1, +1), (-2, +1)], [(+2, +1), (-1, +1)]])
+    sg_other = SGCode.from_tuples([[(-1, +1), (+2, +1)], [(-2, +1), (+1, +1)]])
+
+    assert sg.canonical() == sg_other.canonical()
+    assert SGCode.from_tuples([[], []]).canonical() == SGCode.from_tuples([[], []])
+
+
+def test_hash_and_equality():
+    sg = PDCode.from_tuples(
+        [(3, 6, 4, 1), (5, 2, 6, 3), (1, 4, 2, 5)]
+    ).to_signed_gauss_code()
+    sg_copy = SGCode([list(component) for component in sg.components])
+
+    assert sg == sg_copy and hash(sg) == hash(sg_copy)
+
+    # switched and mirrored diagrams have the same ids but different hashes
+    for other in (sg.switch_crossing(1), sg.mirror()):
+        assert other != sg and hash(other) != hash(sg)
+
+    assert pickle.loads(pickle.dumps(sg)) == sg
+
+
+def test_crossings_are_interned():
+    crossing = SGCodeCrossing(1, CROSSING_OVER, HANDED_LEFT)
+
+    assert SGCodeCrossing(1, CROSSING_OVER, HANDED_LEFT) is crossing
+    assert crossing.switch().switch() is crossing
+    assert crossing.opposite().opposite() is crossing
+    assert crossing.flip_handedness() is not crossing
+    assert pickle.loads(pickle.dumps(crossing)) is crossing
+
+
+def test_crossing_index():
+    sg = LINK_1
+
+    for id, occurrences in sg.crossing_index.items():
+        assert len(occurrences) == 2
+        for i, j, crossing in occurrences:
+            assert sg.components[i][j] is crossing and crossing.id == id
+
+    assert sorted(sg.crossing_index) == sorted(
+        {c.id for component in sg.components for c in component}
+    )
+
+
+def test_skein_children():
+    sg = LINK_1
+
+    for id in sg.crossing_index:
+        switched = sg.switch_crossing(id)
+        assert sg.skein_children(id) == (
+            switched, switched.splice_h(id), switched.splice_v(id)
+        )
+
+
+def test_switches_share_untouched_components():
+    sg = LINK_1
+
+    for id, ((i1, _, _), (i2, _, _)) in sg.crossing_index.items():
+        switched = sg.switch_crossing(id)
+        assert switched == sg.apply_switching_sequence([id])
+        assert switched.switch_crossing(id) == sg
+
+        for i, component in enumerate(sg.components):
+            assert (switched.components[i] is component) == (i not in (i1, i2))
+
+
+def test_normalized():
+    sg = LINK_1
+
+    for id in sg.crossing_index:
+        for link in sg.skein_children(id):
+            assert link.normalized() == link.to_minimal().relabel()
+            assert SGCode.from_values(link.values()) == link
+
+
+def test_crossing_masks():
+    crossings = [
+        SGCodeCrossing(1, CROSSING_OVER, HANDED_LEFT),
+        SGCodeCrossing(3, CROSSING_UNDER, HANDED_RIGHT),
+        SGCodeCrossing(1, CROSSING_UNDER, HANDED_LEFT),
+    ]
+
+    assert crossing_masks(c.value for c in crossings) == (0b10, 0b1010)
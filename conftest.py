@@ -0,0 +1,21 @@
+import base_table
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "base_table: run the test with the shipped table of the small diagrams"
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_base_table(request, monkeypatch):
+    """
+    The table answers every diagram with up to 5 crossings in a single lookup,
+    so by default the tests run without it and the recursions really run. The
+    tests of the table itself are marked with `base_table`.
+    """
+    if request.node.get_closest_marker('base_table') is None:
+        monkeypatch.setattr(base_table, '_table', None)
+    else:
+        monkeypatch.setattr(base_table, '_table', base_table.BaseTable())
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from laurent import LaurentPolynomial
+from typing import Literal
+
+
+DeferredOp = Literal['leaf', 'value', 'add', 'mul', 'neg', 'substitute']
+
+
+class DeferredPolynomial:
+    """
+    A node of an expression DAG whose value is a `laurent.LaurentPolynomial`.
+
+    Arithmetic between nodes does not compute anything, it only builds a new
+    `add`, `mul` or `neg` node pointing to its operands. The recursions return
+    their cached results as nodes, so a subresult used in many places of the
+    skein tree is a single shared node, and it is expanded only once when the
+    root is flattened by `value()`.
+
+    Leaves are the variables, the constants and the expressions made only from
+    them, like `d`: operations between two leaves are computed right away, so
+    leaves stay small. The results of the recursion and the subresults read from
+    the caches are `value` nodes instead, they hold a computed polynomial but are
+    never folded, so the expressions built from them are real nodes of the DAG.
+    """
+
+    __slots__ = ('op', 'args', 'substitution', '_value')
+
+    op: DeferredOp
+    args: tuple
+    # the arguments of `LaurentPolynomial.substitute` for the `substitute` nodes
+    substitution: tuple | None
+    _value: LaurentPolynomial | None
+
+    def __init__(self, op: DeferredOp, args: tuple, substitution: tuple | None = None):
+        self.op = op
+        self.args = args
+        self.substitution = substitution
+        self._value = args[0] if op in ('leaf', 'value') else None
+
+    @staticmethod
+    def leaf(value: LaurentPolynomial | int) -> DeferredPolynomial:
+        return DeferredPolynomial('leaf', (LaurentPolynomial.coerce(value),))
+
+    @staticmethod
+    def result(value: LaurentPolynomial | int) -> DeferredPolynomial:
+        """
+        A computed polynomial as a `value` node, see the class docs.
+        """
+        return DeferredPolynomial('value', (LaurentPolynomial.coerce(value),))
+
+    @staticmethod
+    def coerce(value: DeferredPolynomial | LaurentPolynomial | int) -> DeferredPolynomial:
+        if isinstance(value, DeferredPolynomial):
+            return value
+
+        return DeferredPolynomial.leaf(value)
+
+    def is_leaf(self) -> bool:
+        return self.op == 'leaf'
+
+    def as_node(self) -> DeferredPolynomial:
+        """
+        This polynomial as a node that is not folded, a leaf becomes a `value`.
+        """
+        return DeferredPolynomial.result(self._value) if self.is_leaf() else self
+
+    def value(self) -> LaurentPolynomial:
+        """
+        Flatten the DAG to a polynomial. Each node is expanded once and its value
+        is kept, so shared nodes are never expanded again, not even by later
+        calls on other roots.
+        """
+        # iterative post-order visit, the DAG can be as deep as the skein tree
+        stack: list[DeferredPolynomial] = [self]
+        while stack:
+            node = stack[-1]
+            if node._value is not None:
+                stack.pop()
+                continue
+
+            pending = [
+                arg for arg in node.args
+                if arg._value is None
+            ]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            stack.pop()
+            node._value = node._evaluate()
+
+        assert self._value is not None
+        return self._value
+
+    def _evaluate(self) -> LaurentPolynomial:
+        match self.op:
+            case 'add':
+                x, y = self.args
+                return x._value + y._value
+            case 'mul':
+                x, y = self.args
+                return x._value * y._value
+            case 'neg':
+                x, = self.args
+                return -x._value
+            case 'substitute':
+                x, = self.args
+                return x._value.substitute(*self.substitution)
+
+        raise ValueError(f"Unknown deferred operation: {self.op}")
+
+    def _binary(self, op: DeferredOp, other: DeferredPolynomial | int) -> DeferredPolynomial:
+        other = DeferredPolynomial.coerce(other)
+
+        if self.is_leaf() and other.is_leaf():
+            x, y = self._value, other._value
+            return DeferredPolynomial.leaf(x + y if op == 'add' else x * y)
+
+        return DeferredPolynomial(op, (self, other))
+
+    def substitute(self, substitution: tuple) -> DeferredPolynomial:
+        """
+        A node for `LaurentPolynomial.substitute` with the given arguments.
+        """
+        return DeferredPolynomial('substitute', (self.as_node(),), substitution)
+
+    def __add__(self, other: DeferredPolynomial | int) -> DeferredPolynomial:
+        if not isinstance(other, (DeferredPolynomial, int)):
+            return NotImplemented
+        return self._binary('add', other)
+
+    def __radd__(self, other: int) -> DeferredPolynomial:
+        return self + other
+
+    def __neg__(self) -> DeferredPolynomial:
+        if self.is_leaf():
+            return DeferredPolynomial.leaf(-self._value)
+        return DeferredPolynomial('neg', (self,))
+
+    def __sub__(self, other: DeferredPolynomial | int) -> DeferredPolynomial:
+        if not isinstance(other, (DeferredPolynomial, int)):
+            return NotImplemented
+        return self + -DeferredPolynomial.coerce(other)
+
+    def __rsub__(self, other: int) -> DeferredPolynomial:
+        return -self + other
+
+    def __mul__(self, other: DeferredPolynomial | int) -> DeferredPolynomial:
+        if not isinstance(other, (DeferredPolynomial, int)):
+            return NotImplemented
+        return self._binary('mul', other)
+
+    def __rmul__(self, other: int) -> DeferredPolynomial:
+        return self * other
+
+    def __pow__(self, n: int) -> DeferredPolynomial:
+        if self.is_leaf():
+            return DeferredPolynomial.leaf(self._value ** n)
+        return DeferredPolynomial.result(self.value() ** n)
+
+    def __truediv__(self, other: DeferredPolynomial | int) -> DeferredPolynomial:
+        # only division by a monomial is supported, as for the Laurent polynomials
+        if not isinstance(other, (DeferredPolynomial, int)):
+            return NotImplemented
+        return self * DeferredPolynomial.leaf(
+            1 / DeferredPolynomial.coerce(other).value()
+        )
+
+    def __rtruediv__(self, other: int) -> DeferredPolynomial:
+        if self.is_leaf():
+            return DeferredPolynomial.leaf(other / self._value)
+        return DeferredPolynomial.result(other / self.value())
+
+    def __reduce__(self):
+        # pickled flattened, e.g. by `skein_cache.SpillSegment`, as the DAG can
+        # be too deep for pickle and its nodes are shared with the live ones
+        if self.is_leaf():
+            return DeferredPolynomial.leaf, (self._value,)
+        return DeferredPolynomial.result, (self.value(),)
+
+    def __str__(self):
+        # printing must not flatten, the debug log prints every result
+        if self._value is not None:
+            return str(self._value)
+        return f"<deferred {self.op}>"
+
+    def __repr__(self):
+        return f"DeferredPolynomial({self.op!r}, {len(self.args)} args)"
@@ -0,0 +1,89 @@
+import kauffman
+import pytest
+
+from codes import PDCode
+from deferred import DeferredPolynomial
+from laurent import LaurentPolynomial
+from skein_cache import clear_caches
+
+
+K6_2 = [
+    (11, 3, 12, 2), (9, 5, 10, 4), (1, 6, 2, 7),
+    (3, 9, 4, 8), (5, 11, 6, 10), (7, 12, 8, 1)
+]
+
+
+x = DeferredPolynomial.leaf(LaurentPolynomial.monomial(1, 0))
+y = DeferredPolynomial.leaf(LaurentPolynomial.monomial(0, 1))
+
+
+def test_deferred_leaves_are_eager():
+    d = (x + 1 / x) / y - 1
+
+    assert d.is_leaf()
+    assert d.value() == (
+        LaurentPolynomial.monomial(1, -1)
+        + LaurentPolynomial.monomial(-1, -1)
+        - 1
+    )
+
+
+def test_deferred_shared_nodes():
+    shared = DeferredPolynomial('add', (x, y))
+    root = shared * shared - shared * x
+
+    assert not root.is_leaf()
+    assert shared._value is None
+
+    X, Y = x.value(), y.value()
+    assert root.value() == (X + Y) * (X + Y) - (X + Y) * X
+    assert shared._value == X + Y
+
+    assert (root / y).value() == root.value() / Y
+
+
+def test_recursion_builds_dag(monkeypatch):
+    clear_caches()
+
+    link = PDCode.from_tuples(K6_2).to_signed_gauss_code()
+    root = kauffman._kauffman_polynomial(link, 'deferred')
+
+    # count the parents of every node reachable from the root
+    parents: dict[int, int] = {}
+    nodes = {id(root): root}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for arg in node.args if node.op not in ('leaf', 'value') else ():
+            parents[id(arg)] = parents.get(id(arg), 0) + 1
+            if id(arg) not in nodes:
+                nodes[id(arg)] = arg
+                stack.append(arg)
+
+    inner = [node for node in nodes.values() if node.op not in ('leaf', 'value')]
+    assert inner and all(node._value is None for node in inner)
+    assert any(parents.get(id(node), 0) > 1 for node in inner)
+
+    evaluated: list[int] = []
+    evaluate = DeferredPolynomial._evaluate
+
+    def counting_evaluate(self):
+        evaluated.append(id(self))
+        return evaluate(self)
+
+    monkeypatch.setattr(DeferredPolynomial, '_evaluate', counting_evaluate)
+
+    assert root.value() == kauffman._kauffman_polynomial(link, 'laurent')
+    assert sorted(evaluated) == sorted(id(node) for node in inner)
+
+
+@pytest.mark.base_table
+def test_read_only_stores_do_not_flatten():
+    clear_caches()
+
+    link = PDCode.from_tuples(K6_2).to_signed_gauss_code()
+    root = kauffman._kauffman_polynomial(link, 'deferred')
+
+    # the base table answers the small sub-diagrams, nothing is written to it
+    assert root.op not in ('leaf', 'value') and root._value is None
+    assert root.value() == kauffman._kauffman_polynomial(link, 'laurent')
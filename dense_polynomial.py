@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import numpy as np
+import sympy
+
+from sympy import Expr
+
+
+# coefficients up to this bound (excluded) in absolute value are stored as int64
+INT64_BOUND = 2 ** 63
+
+
+def _max_abs(coeffs: np.ndarray) -> int:
+    return int(np.abs(coeffs).max()) if coeffs.size else 0
+
+
+def _dtype(bound: int) -> type:
+    """
+    The dtype of a matrix whose coefficients are at most `bound` in absolute
+    value: int64, or Python integers in an object array past its range.
+    """
+    return np.int64 if bound < INT64_BOUND else object
+
+
+class DensePolynomial:
+    """
+    A Laurent polynomial in two variables with integer coefficients, stored as a
+    dense 2-D coefficient matrix.
+
+    The entry `coeffs[i, j]` is the coefficient of `x^(i + min_i) y^(j + min_j)`
+    where `(min_i, min_j)` is `offset`. The matrix is always trimmed to the
+    bounding box of the non-zero coefficients, so two equal polynomials have the
+    same matrix and offset. The zero polynomial is an empty `(0, 0)` matrix.
+
+    This is the dense counterpart of `laurent.LaurentPolynomial`: for the
+    diagrams we compute the exponent spans are small and bounded, so whole-array
+    operations are cheaper than per-term Python objects. Multiplying by a
+    monomial only moves the offset, so matrices are shared between instances and
+    must never be modified in place.
+
+    The coefficients are int64 as long as they fit, and the operations check the
+    bounds of their results beforehand, so that past that range the matrices
+    hold Python integers instead of silently overflowing.
+    """
+
+    __slots__ = ('coeffs', 'offset')
+
+    coeffs: np.ndarray
+    offset: tuple[int, int]
+
+    def __init__(self, coeffs: np.ndarray, offset: tuple[int, int] = (0, 0)):
+        coeffs = np.asarray(coeffs)
+        if coeffs.dtype != object or _max_abs(coeffs) < INT64_BOUND:
+            coeffs = coeffs.astype(np.int64, copy=False)
+        assert coeffs.ndim == 2
+
+        # trim to the bounding box of the non-zero coefficients
+        rows = np.flatnonzero(coeffs.any(axis=1))
+        if len(rows) == 0:
+            self.coeffs = np.zeros((0, 0), dtype=np.int64)
+            self.offset = (0, 0)
+            return
+
+        cols = np.flatnonzero(coeffs.any(axis=0))
+        r0, r1 = rows[0], rows[-1] + 1
+        c0, c1 = cols[0], cols[-1] + 1
+
+        self.coeffs = coeffs[r0:r1, c0:c1]
+        self.coeffs.flags.writeable = False
+        self.offset = (offset[0] + int(r0), offset[1] + int(c0))
+
+    @staticmethod
+    def _from_trimmed(coeffs: np.ndarray, offset: tuple[int, int]) -> DensePolynomial:
+        poly = DensePolynomial.__new__(DensePolynomial)
+        poly.coeffs = coeffs
+        poly.offset = offset
+        return poly
+
+    @staticmethod
+    def constant(c: int) -> DensePolynomial:
+        return DensePolynomial.monomial(0, 0, c)
+
+    @staticmethod
+    def monomial(i: int, j: int, c: int = 1) -> DensePolynomial:
+        """
+        Return the monomial `c x^i y^j`.
+        """
+        return DensePolynomial(np.array([[c]], dtype=_dtype(abs(c))), (i, j))
+
+    @staticmethod
+    def from_terms(terms: dict[tuple[int, int], int]) -> DensePolynomial:
+        terms = {exponents: c for exponents, c in terms.items() if c != 0}
+        if not terms:
+            return DensePolynomial(np.zeros((0, 0), dtype=np.int64))
+
+        min_i = min(i for i, _ in terms)
+        min_j = min(j for _, j in terms)
+        max_i = max(i for i, _ in terms)
+        max_j = max(j for _, j in terms)
+
+        bound = max(abs(c) for c in terms.values())
+        coeffs = np.zeros((max_i - min_i + 1, max_j - min_j + 1), dtype=_dtype(bound))
+        for (i, j), c in terms.items():
+            coeffs[i - min_i, j - min_j] = c
+
+        return DensePolynomial(coeffs, (min_i, min_j))
+
+    def to_terms(self) -> dict[tuple[int, int], int]:
+        min_i, min_j = self.offset
+        return {
+            (int(i) + min_i, int(j) + min_j): int(self.coeffs[i, j])
+            for i, j in zip(*np.nonzero(self.coeffs))
+        }
+
+    def is_zero(self) -> bool:
+        return self.coeffs.size == 0
+
+    def is_monomial(self) -> bool:
+        return self.coeffs.shape == (1, 1)
+
+    def shift(self, i: int, j: int) -> DensePolynomial:
+        """
+        Multiply by the monomial `x^i y^j`, this only moves the offset.
+        """
+        if self.is_zero() or (i == 0 and j == 0):
+            return self
+
+        return DensePolynomial._from_trimmed(
+            self.coeffs, (self.offset[0] + i, self.offset[1] + j)
+        )
+
+    def scale(self, c: int) -> DensePolynomial:
+        if c == 1:
+            return self
+        if c == 0:
+            return DensePolynomial.constant(0)
+
+        coeffs = self.coeffs.astype(_dtype(_max_abs(self.coeffs) * abs(c)), copy=False)
+        return DensePolynomial._from_trimmed(coeffs * c, self.offset)
+
+    def truncate(self, max_j: int) -> DensePolynomial:
+        """
+        Drop all the terms `x^i y^j` with `j > max_j`.
+        """
+        columns = max_j - self.offset[1] + 1
+        if columns >= self.coeffs.shape[1]:
+            return self
+
+        return DensePolynomial(self.coeffs[:, :max(columns, 0)], self.offset)
+
+    def _combine(self, other: DensePolynomial, sign: int) -> DensePolynomial:
+        """
+        Return `self + sign * other` by shifting both matrices into their common
+        bounding box.
+        """
+        if other.is_zero():
+            return self
+        if self.is_zero():
+            return other.scale(sign)
+
+        (si, sj), (oi, oj) = self.offset, other.offset
+        (sh, sw), (oh, ow) = self.coeffs.shape, other.coeffs.shape
+
+        min_i, min_j = min(si, oi), min(sj, oj)
+        max_i, max_j = max(si + sh, oi + oh), max(sj + sw, oj + ow)
+
+        bound = _max_abs(self.coeffs) + _max_abs(other.coeffs)
+        coeffs = np.zeros((max_i - min_i, max_j - min_j), dtype=_dtype(bound))
+        coeffs[si - min_i:si - min_i + sh, sj - min_j:sj - min_j + sw] = self.coeffs
+
+        target = coeffs[oi - min_i:oi - min_i + oh, oj - min_j:oj - min_j + ow]
+        if sign > 0:
+            target += other.coeffs
+        else:
+            target -= other.coeffs
+
+        return DensePolynomial(coeffs, (min_i, min_j))
+
+    def __add__(self, other: DensePolynomial | int) -> DensePolynomial:
+        if isinstance(other, int):
+            other = DensePolynomial.constant(other)
+        elif not isinstance(other, DensePolynomial):
+            return NotImplemented
+
+        return self._combine(other, +1)
+
+    def __radd__(self, other: int) -> DensePolynomial:
+        return self + other
+
+    def __neg__(self) -> DensePolynomial:
+        return self.scale(-1)
+
+    def __sub__(self, other: DensePolynomial | int) -> DensePolynomial:
+        if isinstance(other, int):
+            other = DensePolynomial.constant(other)
+        elif not isinstance(other, DensePolynomial):
+            return NotImplemented
+
+        return self._combine(other, -1)
+
+    def __rsub__(self, other: int) -> DensePolynomial:
+        return DensePolynomial.constant(other) - self
+
+    def __mul__(self, other: DensePolynomial | int) -> DensePolynomial:
+        if isinstance(other, int):
+            return self.scale(other)
+        elif not isinstance(other, DensePolynomial):
+            return NotImplemented
+
+        if self.is_zero() or other.is_zero():
+            return DensePolynomial.constant(0)
+
+        # multiplying by a monomial only moves the offset
+        if other.is_monomial():
+            return self.shift(*other.offset).scale(int(other.coeffs[0, 0]))
+        if self.is_monomial():
+            return other.shift(*self.offset).scale(int(self.coeffs[0, 0]))
+
+        # 2-D convolution, accumulate a shifted copy of the larger matrix for
+        # each non-zero entry of the smaller one
+        big, small = (
+            (self, other) if self.coeffs.size >= other.coeffs.size
+            else (other, self)
+        )
+
+        (bh, bw), (sh, sw) = big.coeffs.shape, small.coeffs.shape
+        # every coefficient of the product is a sum of at most `small.coeffs.size`
+        # products of coefficients
+        bound = _max_abs(big.coeffs) * _max_abs(small.coeffs) * small.coeffs.size
+        coeffs = np.zeros((bh + sh - 1, bw + sw - 1), dtype=_dtype(bound))
+        big_coeffs = big.coeffs.astype(coeffs.dtype, copy=False)
+        small_coeffs = small.coeffs.astype(coeffs.dtype, copy=False)
+        for i, j in zip(*np.nonzero(small_coeffs)):
+            coeffs[i:i + bh, j:j + bw] += small_coeffs[i, j] * big_coeffs
+
+        return DensePolynomial(coeffs, (
+            self.offset[0] + other.offset[0],
+            self.offset[1] + other.offset[1],
+        ))
+
+    def __rmul__(self, other: int) -> DensePolynomial:
+        return self * other
+
+    def __pow__(self, n: int) -> DensePolynomial:
+        if self.is_monomial():
+            c = int(self.coeffs[0, 0])
+            if n < 0 and c not in (1, -1):
+                raise ValueError(
+                    f"Cannot invert the monomial {self} over the integers"
+                )
+            i, j = self.offset
+            return DensePolynomial.monomial(i * n, j * n, c ** abs(n))
+
+        if n < 0:
+            raise ValueError(f"Cannot invert the polynomial {self}")
+
+        result = DensePolynomial.constant(1)
+        base = self
+        while n > 0:
+            if n & 1:
+                result = result * base
+            base = base * base
+            n >>= 1
+
+        return result
+
+    def __truediv__(self, other: DensePolynomial | int) -> DensePolynomial:
+        """
+        Division is only supported by invertible monomials, i.e. `±x^i y^j`.
+        """
+        if isinstance(other, int):
+            other = DensePolynomial.constant(other)
+        elif not isinstance(other, DensePolynomial):
+            return NotImplemented
+
+        return self * other ** -1
+
+    def __rtruediv__(self, other: int) -> DensePolynomial:
+        return DensePolynomial.constant(other) / self
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, int):
+            other = DensePolynomial.constant(other)
+        elif not isinstance(other, DensePolynomial):
+            return NotImplemented
+
+        return (
+            self.offset == other.offset
+            and np.array_equal(self.coeffs, other.coeffs)
+        )
+
+    def __hash__(self):
+        # the dtype only depends on the coefficients, see `_dtype`
+        data = self.coeffs.tobytes() if self.coeffs.dtype != object else tuple(self.coeffs.flat)
+        return hash((self.offset, self.coeffs.shape, data))
+
+    def to_sympy(self, x: Expr, y: Expr) -> Expr:
+        """
+        Convert to an expanded SymPy expression in the variables `x` and `y`.
+        """
+        return sympy.Add(*(
+            c * x ** i * y ** j
+            for (i, j), c in sorted(self.to_terms().items())
+        ))
+
+    def __str__(self):
+        if self.is_zero():
+            return "0"
+
+        return " + ".join(
+            f"{c} x^{i} y^{j}"
+            for (i, j), c in sorted(self.to_terms().items())
+        )
+
+    def __repr__(self):
+        return f"DensePolynomial({self.to_terms()!r})"
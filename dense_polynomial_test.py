@@ -0,0 +1,78 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from codes import SGCode, PDCode
+from dense_polynomial import DensePolynomial
+from laurent import LaurentPolynomial
+from kauffman import kauffman_polynomial, f_polynomial
+from homfly import homfly_polynomial
+from sympy import symbols
+
+
+a, z = symbols("a z")
+
+_a = DensePolynomial.monomial(1, 0)
+_z = DensePolynomial.monomial(0, 1)
+
+
+def test_dense_arithmetic():
+    p = (_a + 1 / _a) / _z - 1
+
+    assert p.offset == (-1, -1)
+    assert p.to_sympy(a, z) == ((a + 1 / a) / z - 1).expand()
+    assert (p * p).to_sympy(a, z) == (((a + 1 / a) / z - 1) ** 2).expand()
+    assert (p ** 3).to_sympy(a, z) == (((a + 1 / a) / z - 1) ** 3).expand()
+
+
+def test_dense_trimming():
+    p = _z * (_a + _a ** -1) - _a * _z
+
+    assert p == _a ** -1 * _z
+    assert p.coeffs.shape == (1, 1)
+    assert (p - p).is_zero()
+    assert p - p == 0
+
+
+def test_dense_matches_laurent():
+    terms = {(-2, 1): 3, (0, 0): -1, (1, 4): 2}
+    q_terms = {(1, -1): 1, (0, 2): -5}
+
+    dense = DensePolynomial.from_terms(terms) * DensePolynomial.from_terms(q_terms)
+    sparse = LaurentPolynomial(terms) * LaurentPolynomial(q_terms)
+
+    assert dense.to_terms() == sparse.terms
+
+
+def test_dense_past_int64():
+    big = 2 ** 40
+    p = DensePolynomial.from_terms({(0, 0): big, (1, 2): -big})
+    expected = LaurentPolynomial({(0, 0): big, (1, 2): -big})
+
+    # the coefficients of p^3 do not fit in int64, they must not wrap around
+    assert (p ** 3).to_terms() == (expected * expected * expected).terms
+    assert (p * big * big).to_terms() == (expected * (big * big)).terms
+    assert p * big * big - p * big * big == 0
+
+    # back in range the matrices are int64 again
+    assert (p * big * big + p * big * big).coeffs.dtype == object
+    q = DensePolynomial.from_terms({(0, 0): 2 ** 70}) - DensePolynomial.from_terms({(0, 0): 2 ** 70 - 1})
+    assert q == 1 and q.coeffs.dtype == np.int64 and hash(q) == hash(DensePolynomial.constant(1))
+
+
+def test_dense_backend_kauffman():
+    sg = PDCode.from_tuples(
+        [(1, 5, 2, 4), (3, 1, 4, 6), (5, 3, 6, 2)]
+    ).to_signed_gauss_code()
+
+    assert kauffman_polynomial(sg, backend='dense') == kauffman_polynomial(sg)
+    assert f_polynomial(sg, backend='dense') == f_polynomial(sg)
+
+
+def test_dense_backend_homfly():
+    sg = SGCode.from_tuples([
+        [(+1, -1), (-2, -1)],
+        [(-1, -1), (+2, -1)],
+    ])
+
+    assert homfly_polynomial(sg, backend='dense') == homfly_polynomial(sg)
@@ -1,11 +1,13 @@
 import functools
+import operator
+import sympy
 import utils
 
-from polynomial_commons import polynomial_wrapper
+from polynomial_commons import Backend, BackendName, get_backend, polynomial_wrapper
 from equation_dsl import Expression
 from codes import HANDED_LEFT, SGCode
-from typing import Callable
-from sympy import solve, symbols, Poly, Eq, Expr
+from typing import Any, Callable
+from sympy import solve, symbols, Poly, Eq, Expr, Symbol
 from utils import depth_print
 
 
@@ -16,11 +18,38 @@ SingleComponentPoly = KnotPoly
 MultiComponentPoly = Callable[[KnotPoly, list[SGCode]], Poly]
 
 
+def evaluate_expression(expr: Expr, env: dict[Symbol, Any]) -> Any:
+    """
+    Evaluate a SymPy expression built from symbols, integers, sums, products and
+    integer powers, replacing each symbol with its value in `env`. The values can
+    be elements of any backend, as only Python operators are used.
+    """
+    if expr.is_Symbol:
+        if expr not in env:
+            raise ValueError(f"Unknown symbol {expr} in skein relation")
+        return env[expr]
+    if expr.is_Integer:
+        return int(expr)
+    if expr.is_Add:
+        return functools.reduce(
+            operator.add, (evaluate_expression(arg, env) for arg in expr.args)
+        )
+    if expr.is_Mul:
+        return functools.reduce(
+            operator.mul, (evaluate_expression(arg, env) for arg in expr.args)
+        )
+    if expr.is_Pow and expr.exp.is_Integer:
+        return evaluate_expression(expr.base, env) ** int(expr.exp)
+
+    raise ValueError(f"Unsupported expression in skein relation: {expr}")
+
+
 def generic_unknot_skein_polynomial(
     f: Expression,
     eqs: list[Expression],
     case_std_unknot: SingleComponentPoly = lambda _: 1,
-    case_disjoint: MultiComponentPoly | None = None
+    case_disjoint: MultiComponentPoly | None = None,
+    variables: tuple[Symbol, Symbol] | None = None,
 ) -> Callable[[SGCode], Poly]:
     """
     A generic skein polynomial function that can be used to construct different polynomial types.
@@ -33,9 +62,18 @@ def generic_unknot_skein_polynomial(
             Defaults to returning 1.
         case_disjoint (MultiComponentPoly | None, optional): A function that handles the case of disjoint links.
             Defaults to None, which raises an error if disjoint links are encountered.
+        variables (tuple[Symbol, Symbol] | None, optional): The two variables of the
+            polynomial, needed to run the recursion on a backend other than SymPy.
+            Defaults to None, in which case the SymPy backend is always used.
 
     Returns:
-        Callable[[SGCode], Poly]: A function that computes the polynomial for a given SGCode.
+        Callable[[SGCode], Poly]: A function that computes the polynomial for a given SGCode,
+        it also accepts optional backend and point arguments when `variables` is given.
+
+    Note:
+        The base cases are SymPy-level callbacks, on other backends their results
+        (and the recursive results passed to `case_disjoint`) are converted to and
+        from SymPy using `variables`.
     """
 
     name = str(f)
@@ -72,9 +110,23 @@ def generic_unknot_skein_polynomial(
     print(f"ℹ️  {name}(L.positive): {poly_positive_solution}")
     print(f"ℹ️  {name}(L.negative): {poly_negative_solution}")
 
-    @polynomial_wrapper()
-    def skein_polynomial(link: SGCode) -> Poly:
-        assert len(link.components) > 0, "Link must have at least one component"
+    def from_sympy(backend: Backend, value):
+        if isinstance(value, sympy.Basic) and variables is not None:
+            return backend.from_sympy(value, variables)
+        return value
+
+    def evaluate_solution(solution: Expr, backend: Backend, rec_evals: dict[Symbol, Any]):
+        if variables is None:
+            return solution.subs(rec_evals)
+
+        generators = backend.variables(tuple(str(x) for x in variables))
+        return evaluate_expression(
+            solution, dict(zip(variables, generators)) | rec_evals
+        )
+
+    @polynomial_wrapper(backend='sympy' if variables is None else None)
+    def skein_polynomial(link: SGCode, backend: Backend) -> Poly:
+        assert link.components_count() > 0, "Link must have at least one component"
 
         component_groups = link.overlies_decomposition()
 
@@ -83,7 +135,7 @@ def generic_unknot_skein_polynomial(
 
             if unknotting_index == False:
                 depth_print("ℹ️  standard unknot form")
-                return case_std_unknot(link)
+                return from_sympy(backend, case_std_unknot(link))
             else:
                 depth_print("ℹ️  single knotted component")
                 depth_print(f"ℹ️  unknotting index: {unknotting_index!r}")
@@ -91,57 +143,78 @@ def generic_unknot_skein_polynomial(
                 if link.get_crossing_handedness(unknotting_index) == HANDED_LEFT:
                     depth_print(f"ℹ️  positive crossing")
 
-                    rec_evals: dict[Expr, Poly] = {}
+                    rec_evals: dict[Symbol, Any] = {}
 
                     if poly_positive_solution.has(var_eval_L_splice_h):
                         depth_print(f"ℹ️  spliced h")
                         rec_evals[var_eval_L_splice_h] = skein_polynomial(
-                            link.splice_h(unknotting_index)
+                            link.splice_h(unknotting_index), backend
                         )
                     if poly_positive_solution.has(var_eval_L_splice_v):
                         depth_print(f"ℹ️  spliced v")
                         rec_evals[var_eval_L_splice_v] = skein_polynomial(
-                            link.splice_v(unknotting_index)
+                            link.splice_v(unknotting_index), backend
                         )
                     if poly_positive_solution.has(var_eval_L_negative):
                         depth_print(f"ℹ️  switched")
                         rec_evals[var_eval_L_negative] = skein_polynomial(
-                            link.switch_crossing(unknotting_index)
+                            link.switch_crossing(unknotting_index), backend
                         )
 
-                    return poly_positive_solution.subs(rec_evals)
+                    return evaluate_solution(
+                        poly_positive_solution, backend, rec_evals
+                    )
                 else:
                     depth_print(f"ℹ️  negative crossing")
 
-                    rec_evals: dict[Expr, Poly] = {}
+                    rec_evals: dict[Symbol, Any] = {}
 
                     if poly_negative_solution.has(var_eval_L_splice_h):
                         depth_print(f"ℹ️  spliced h")
                         rec_evals[var_eval_L_splice_h] = skein_polynomial(
                             # WARNING: switched for negative crossing
-                            link.splice_v(unknotting_index)
+                            link.splice_v(unknotting_index), backend
                         )
                     if poly_negative_solution.has(var_eval_L_splice_v):
                         depth_print(f"ℹ️  spliced v")
                         rec_evals[var_eval_L_splice_v] = skein_polynomial(
                             # WARNING: switched for negative crossing
-                            link.splice_h(unknotting_index)
+                            link.splice_h(unknotting_index), backend
                         )
                     if poly_negative_solution.has(var_eval_L_positive):
                         depth_print(f"ℹ️  switched")
                         rec_evals[var_eval_L_positive] = skein_polynomial(
-                            link.switch_crossing(unknotting_index)
+                            link.switch_crossing(unknotting_index), backend
                         )
 
-                    return poly_negative_solution.subs(rec_evals)
+                    return evaluate_solution(
+                        poly_negative_solution, backend, rec_evals
+                    )
         else:
             if case_disjoint is None:
                 raise ValueError(
                     "case_disjoint must be provided for disjoint links")
 
-            return case_disjoint(skein_polynomial, [
+            def rec(sublink: SGCode) -> Poly:
+                result = skein_polynomial(sublink, backend)
+                if variables is None:
+                    return result
+                return backend.to_sympy(result, variables)
+
+            return from_sympy(backend, case_disjoint(rec, [
                 link.sublink(component_ids)
                 for component_ids in component_groups
-            ])
+            ]))
+
+    if variables is None:
+        return skein_polynomial
+
+    def polynomial(
+        link: SGCode,
+        backend: Backend | BackendName | None = None,
+        point: tuple[Any, Any] | None = None,
+    ) -> Poly:
+        backend = get_backend(backend, point)
+        return backend.to_sympy(skein_polynomial(link, backend), variables)
 
-    return skein_polynomial
+    return polynomial
@@ -71,3 +71,39 @@ def test_synthetic_writhe():
     P_expected = 3
 
     assert simplify(P_result) == simplify(P_expected)
+
+
+def test_synthetic_homfly_backends():
+    v, z = symbols("v z")
+    d = (v ** (-1) - v) / z
+
+    homfly = Var("homfly")
+    LL = Var("L")
+
+    synthetic_homfly_polynomial = generic_unknot_skein_polynomial(
+        homfly,
+        [
+            homfly(LL.positive) / v - homfly(LL.negative) * v
+            ==
+            homfly(LL.splice_h) * z
+        ],
+        case_std_unknot=lambda _: 1,
+        case_disjoint=lambda rec, components: (
+            d ** (len(components) - 1) *
+            reduce(
+                operator.mul,
+                (rec(c) for c in components),
+                1
+            )
+        ),
+        variables=(v, z),
+    )
+
+    sg_trefoil = SGCode.from_tuples([
+        [(+1, +1), (-2, +1), (+3, +1),
+         (-1, +1), (+2, +1), (-3, +1)]
+    ])
+    P_expected = (2*v ** 2 - v ** 4 + v ** 2*z ** 2).expand()
+
+    assert synthetic_homfly_polynomial(sg_trefoil, backend='laurent') == P_expected
+    assert synthetic_homfly_polynomial(sg_trefoil, backend='sympy') == P_expected
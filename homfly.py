@@ -1,32 +1,45 @@
-import utils
-
-from functools import cache
+from functools import lru_cache
 from codes import SGCode, HANDED_LEFT
 from sympy import symbols, Poly
+from typing import Any
 from utils import log_input_output, depth_print
-from polynomial_commons import polynomial_wrapper
+from skein_cache import DEFAULT_MAX_BYTES, CacheStats, SkeinCache
+from polynomial_commons import IDENTITY, Backend, BackendName, get_backend, polynomial_wrapper
 
 
 v, z = symbols("v z")
 d = (v ** (-1) - v) / z
 
 
+@lru_cache(maxsize=8)
+def _variables(backend: Backend):
+    """
+    Native counterparts of `v`, `z` and `d` in the given backend, used inside
+    the recursion. Only the last few backends are kept, as a new point or
+    vector backend is made for every evaluation.
+    """
+    _v, _z = backend.variables(("v", "z"))
+    return _v, _z, (_v ** (-1) - _v) / _z
+
+
 # KnotInfo HOMFLY convention:
 # - P(O) = 1
 # - P(L_+) / v - P(L_-) * v = P(L_0) * z
 
 
-@polynomial_wrapper()
+# P(mirror)(v, z) = P(1/v, -z) and reversing all the components does not change P
+@polynomial_wrapper(
+    optimizations={'expand', 'packed', 'canonical'},
+    symmetries={'mirror': ((1, -1), (-1, 1)), 'reverse': IDENTITY},
+)
 @log_input_output
-@cache
-def homfly_polynomial(link: SGCode) -> Poly:
-    """
-    Computes the HOMFLY polynomial P(v, z) for a given knot.
-    """
-
+@SkeinCache(max_bytes=DEFAULT_MAX_BYTES)
+def _homfly_polynomial(link: SGCode, backend: Backend):
     depth_print("ℹ️  not cached...")
 
-    assert len(link.components) > 0
+    _v, _z, _d = _variables(backend)
+
+    assert link.components_count() > 0
 
     disconnected_components = link.overlies_decomposition()
 
@@ -35,7 +48,7 @@ def homfly_polynomial(link: SGCode) -> Poly:
 
         if unknotting_index == False:
             depth_print("ℹ️  standard unknot form")
-            return v**0
+            return backend.constant(1)
 
         else:
             depth_print("ℹ️  single knotted component")
@@ -45,65 +58,66 @@ def homfly_polynomial(link: SGCode) -> Poly:
 
             if link.get_crossing_handedness(unknotting_index) == HANDED_LEFT:
                 depth_print(f"ℹ️  spliced")
-                homfly_spliced = homfly_polynomial(
-                    link.splice_h(unknotting_index)
+                homfly_spliced = _homfly_polynomial(
+                    link.splice_h(unknotting_index), backend
                 )
 
                 depth_print(f"ℹ️  switched")
-                homfly_switched = homfly_polynomial(link_switched)
+                homfly_switched = _homfly_polynomial(link_switched, backend)
 
                 # P(L_+) = v * (P(L_0) * z + P(L_-) * v)
-                return v * (
-                    homfly_spliced * z + homfly_switched * v
+                return _v * (
+                    homfly_spliced * _z + homfly_switched * _v
                 )
 
             else:
                 depth_print(f"ℹ️  spliced")
-                homfly_spliced = homfly_polynomial(
-                    link.splice_v(unknotting_index)
+                homfly_spliced = _homfly_polynomial(
+                    link.splice_v(unknotting_index), backend
                 )
 
                 depth_print(f"ℹ️  switched")
-                homfly_switched = homfly_polynomial(link_switched)
+                homfly_switched = _homfly_polynomial(link_switched, backend)
 
                 # P(L_-) = (P(L_+) / v -  P(L_0) * z) / v
-                return 1 / v * (
-                    homfly_switched / v - homfly_spliced * z
+                return 1 / _v * (
+                    homfly_switched / _v - homfly_spliced * _z
                 )
 
     else:
         depth_print("ℹ️  multiple unlinked components")
 
-        result = 1
+        result = backend.constant(1)
         for k, component_ids in enumerate(disconnected_components):
-            own_crossings = set(
-                crossing.id
-                for i in component_ids
-                for crossing in link.components[i]
-                if crossing.is_over()
-            ).intersection(
-                set(
-                    crossing.id
-                    for i in component_ids
-                    for crossing in link.components[i]
-                    if crossing.is_under()
-                )
-            )
-
-            new_link = SGCode(
-                [
-                    [
-                        c
-                        for c in link.components[i]
-                        if c.id in own_crossings
-                    ]
-                    for i in component_ids
-                ]
-            )
+            new_link = link.sublink(component_ids)
 
             if k > 0:
-                result *= d
+                result *= _d
 
-            result *= homfly_polynomial(new_link).simplify()
+            result *= _homfly_polynomial(new_link, backend)
 
         return result
+
+
+def homfly_polynomial(
+    link: SGCode,
+    backend: Backend | BackendName | None = None,
+    point: tuple[Any, Any] | None = None,
+) -> Poly:
+    """
+    Computes the HOMFLY polynomial P(v, z) for a given knot.
+
+    With `point = (v0, z0)` the recursion runs on the numbers themselves (e.g.
+    `Fraction`, `modular.ModInt` or `complex`) and the value P(v0, z0) is
+    returned, no polynomial is built.
+    """
+    backend = get_backend(backend, point)
+    return backend.to_sympy(_homfly_polynomial(link, backend), (v, z))
+
+
+def cache_stats() -> CacheStats:
+    """
+    Hits, misses and sizes of the caches of the HOMFLY recursion in this
+    process, by crossings and by depth, see `skein_cache.CacheStats`.
+    """
+    return _homfly_polynomial.cache_stats()
@@ -0,0 +1,247 @@
+"""
+Evaluation and interpolation engine for the Kauffman and HOMFLY polynomials.
+
+Instead of carrying polynomials through the skein tree, the recursion is run
+with both variables replaced by vectors of integers modulo word-size primes
+(see `polynomial_commons.VectorBackend`), one entry per grid point, so the tree
+is traversed once and every node is a few whole-array operations. The exact
+Laurent polynomial is then rebuilt by dense bivariate interpolation on a grid of
+points, using degree bounds taken from the crossing and component counts, and
+by Chinese remaindering over several primes.
+"""
+
+import concurrent.futures
+import kauffman
+import homfly
+import utils
+
+from dataclasses import dataclass
+from typing import Any, Callable, Literal
+from codes import SGCode
+from laurent import LaurentPolynomial
+from modular import PRIMES, ModInt, crt, interpolate_mod, symmetric_residue
+from polynomial_commons import PointBackend, VectorBackend
+from sympy import Poly
+
+
+InterpolatedPolynomial = Literal['L', 'F', 'P']
+
+
+@dataclass(frozen=True)
+class DegreeBounds:
+    """
+    Inclusive bounds on the exponents of the two variables of a polynomial.
+    """
+    min_x: int
+    max_x: int
+    min_y: int
+    max_y: int
+
+
+def kauffman_degree_bounds(link: SGCode) -> DegreeBounds:
+    """
+    Bounds for the Kauffman L polynomial of a diagram with n crossings and m
+    components: every term a^i z^j has |i| <= n + m - 1 and 1 - m <= j <= n.
+
+    Both hold at the leaves of the recursion (a^w with |w| <= n, the unknot
+    constant d has z^-1) and are preserved by the skein relation and by the
+    split-link product, where they add up over the groups.
+    """
+    n = link.crossings_count()
+    m = len(link.components)
+    return DegreeBounds(-(n + m - 1), n + m - 1, 1 - m, n)
+
+
+def homfly_degree_bounds(link: SGCode) -> DegreeBounds:
+    """
+    Bounds for the HOMFLY polynomial of a diagram with n crossings and m
+    components, from the Morton-Franks-Williams inequalities: the v-degree is
+    within w -+ (s - 1) and the z-degree within 1 - m and n - s + 1, where the
+    number of Seifert circles s is at most n + m.
+    """
+    n = link.crossings_count()
+    m = len(link.components)
+    return DegreeBounds(-(2 * n + m - 1), 2 * n + m - 1, 1 - m, n)
+
+
+def _init_worker(debug: bool):
+    utils.global_debug = debug
+
+
+def _evaluate_rows(
+    polynomial: InterpolatedPolynomial, link: SGCode, bounds: DegreeBounds,
+    p: int, xs: list[int], ys: list[int],
+) -> list[list[int]]:
+    """
+    Evaluate the shifted polynomial x^(-min_x) y^(-min_y) f(x, y) modulo p on
+    the grid xs × ys, with a single traversal of the skein tree. Runs in worker
+    processes, so it only takes picklable arguments.
+
+    Without numpy the points are evaluated one at a time with `PointBackend`.
+    """
+    poly_fn = INTERPOLATED_POLYNOMIALS[polynomial][0]
+
+    try:
+        import numpy
+    except ImportError:
+        return [
+            [
+                int(
+                    poly_fn(link, PointBackend(point=(ModInt(x, p), ModInt(y, p))))
+                    * ModInt(x, p) ** -bounds.min_x * ModInt(y, p) ** -bounds.min_y
+                )
+                for y in ys
+            ]
+            for x in xs
+        ]
+
+    backend = VectorBackend(
+        xs=tuple(x for x in xs for _ in ys),
+        ys=tuple(y for _ in xs for y in ys),
+        modulus=p,
+    )
+    x, y = backend.variables(("x", "y"))
+    values = poly_fn(link, backend) * x ** -bounds.min_x * y ** -bounds.min_y
+
+    return values.values.reshape(len(xs), len(ys)).tolist()
+
+
+def _interpolate_mod_p(
+    polynomial: InterpolatedPolynomial, link: SGCode, bounds: DegreeBounds,
+    p: int, executor: concurrent.futures.Executor | None, workers: int,
+) -> dict[tuple[int, int], int]:
+    """
+    Rebuild all the coefficients of the polynomial modulo p, the grid has one
+    point for each possible exponent of each variable.
+    """
+    xs = list(range(2, bounds.max_x - bounds.min_x + 3))
+    ys = list(range(2, bounds.max_y - bounds.min_y + 3))
+
+    if executor is None:
+        rows = _evaluate_rows(polynomial, link, bounds, p, xs, ys)
+    else:
+        # one traversal per worker, each on a slice of the rows
+        chunks = [xs[k::workers] for k in range(workers) if xs[k::workers]]
+        chunk_rows = executor.map(
+            _evaluate_rows,
+            *zip(*((polynomial, link, bounds, p, chunk, ys) for chunk in chunks))
+        )
+
+        rows_by_x = {
+            x: row
+            for chunk, rows in zip(chunks, chunk_rows)
+            for x, row in zip(chunk, rows)
+        }
+        rows = [rows_by_x[x] for x in xs]
+
+    # interpolate in y for each fixed x, then in x for each y-degree
+    y_coeffs = [interpolate_mod(ys, row, p) for row in rows]
+
+    terms: dict[tuple[int, int], int] = {}
+    for j in range(len(ys)):
+        x_coeffs = interpolate_mod(xs, [row[j] for row in y_coeffs], p)
+        for i, c in enumerate(x_coeffs):
+            if c != 0:
+                terms[(i + bounds.min_x, j + bounds.min_y)] = c
+
+    return terms
+
+
+def interpolate_polynomial(
+    polynomial: InterpolatedPolynomial,
+    link: SGCode,
+    workers: int | None = None,
+) -> LaurentPolynomial:
+    """
+    Compute the Kauffman L or F polynomial or the HOMFLY P polynomial of the link
+    by evaluation modulo primes and interpolation.
+
+    Primes are added until the symmetric Chinese remainder reconstruction does
+    not change anymore. With `workers` greater than one, the evaluation grid is
+    split by rows between parallel worker processes.
+    """
+    _, bounds_fn, _ = INTERPOLATED_POLYNOMIALS[polynomial]
+    bounds = bounds_fn(link)
+
+    executor = (
+        concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(utils.global_debug,),
+        )
+        if workers is not None and workers > 1 else None
+    )
+
+    try:
+        residues: dict[tuple[int, int], int] = {}
+        modulus = 1
+        previous: dict[tuple[int, int], int] | None = None
+
+        for p in PRIMES:
+            terms_p = _interpolate_mod_p(
+                polynomial, link, bounds, p, executor, workers or 1
+            )
+
+            residues = {
+                exponents: crt(
+                    residues.get(exponents, 0), modulus,
+                    terms_p.get(exponents, 0), p
+                )[0]
+                for exponents in residues.keys() | terms_p.keys()
+            }
+            modulus *= p
+
+            current = {
+                exponents: c
+                for exponents, r in residues.items()
+                if (c := symmetric_residue(r, modulus)) != 0
+            }
+
+            if current == previous:
+                return LaurentPolynomial(current)
+
+            previous = current
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    raise ValueError("Coefficients did not stabilize, not enough primes")
+
+
+def kauffman_polynomial(link: SGCode, workers: int | None = None) -> Poly:
+    """
+    Computes the Kauffman L polynomial by evaluation and interpolation.
+    """
+    return interpolate_polynomial('L', link, workers).to_sympy(kauffman.a, kauffman.z)
+
+
+def f_polynomial(link: SGCode, workers: int | None = None) -> Poly:
+    """
+    Computes the Kauffman F polynomial by evaluation and interpolation.
+    """
+    return interpolate_polynomial('F', link, workers).to_sympy(kauffman.a, kauffman.z)
+
+
+def homfly_polynomial(link: SGCode, workers: int | None = None) -> Poly:
+    """
+    Computes the HOMFLY polynomial by evaluation and interpolation.
+    """
+    return interpolate_polynomial('P', link, workers).to_sympy(homfly.v, homfly.z)
+
+
+def _f_degree_bounds(link: SGCode) -> DegreeBounds:
+    bounds = kauffman_degree_bounds(link)
+    w = link.writhe()
+    return DegreeBounds(
+        bounds.min_x - w, bounds.max_x - w, bounds.min_y, bounds.max_y
+    )
+
+
+INTERPOLATED_POLYNOMIALS: dict[
+    InterpolatedPolynomial,
+    tuple[Callable[..., Any], Callable[[SGCode], DegreeBounds], str]
+] = {
+    'L': (kauffman.kauffman_polynomial, kauffman_degree_bounds, "Kauffman L"),
+    'F': (kauffman.f_polynomial, _f_degree_bounds, "Kauffman F"),
+    'P': (homfly.homfly_polynomial, homfly_degree_bounds, "HOMFLY"),
+}
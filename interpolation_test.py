@@ -0,0 +1,41 @@
+import interpolation
+import kauffman
+import homfly
+
+from codes import SGCode
+from codes_test import K5_2
+from modular import ModInt, crt, interpolate_mod, symmetric_residue
+
+
+HOPF = SGCode.from_tuples([[(1, +1), (-2, +1)], [(-1, +1), (2, +1)]])
+
+
+def test_modular_arithmetic():
+    p = 101
+    x = ModInt(7, p)
+
+    assert x * x ** -1 == 1
+    assert 1 / x == x ** -1
+    assert x - 10 == ModInt(98, p)
+    assert symmetric_residue(100, p) == -1
+    assert crt(2, 3, 3, 5) == (8, 15)
+
+
+def test_interpolate_mod():
+    p = 101
+    xs = [2, 3, 4, 5]
+    coeffs = [3, 0, 100, 7]
+    ys = [sum(c * x ** i for i, c in enumerate(coeffs)) for x in xs]
+
+    assert interpolate_mod(xs, ys, p) == coeffs
+
+
+def test_interpolation_kauffman():
+    for link in (K5_2, HOPF, K5_2.mirror()):
+        assert interpolation.kauffman_polynomial(link) == kauffman.kauffman_polynomial(link)
+        assert interpolation.f_polynomial(link) == kauffman.f_polynomial(link)
+
+
+def test_interpolation_homfly():
+    for link in (K5_2, HOPF, K5_2.mirror()):
+        assert interpolation.homfly_polynomial(link) == homfly.homfly_polynomial(link)
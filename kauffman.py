@@ -1,22 +1,55 @@
-from functools import cache
+from functools import lru_cache
 from codes import SGCode
 from sympy import symbols, Poly
+from typing import Any
 from utils import log_input_output, depth_print
-from polynomial_commons import polynomial_wrapper
+from skein_cache import DEFAULT_MAX_BYTES, CacheStats, SkeinCache
+from polynomial_commons import IDENTITY, Backend, BackendName, get_backend, polynomial_wrapper
 
 
 a, z = symbols("a z")
 d = (a + 1 / a) / z - 1
 
 
-@polynomial_wrapper(optimizations={'expand', 'relabel', 'to_minimal'})
+@lru_cache(maxsize=8)
+def _variables(backend: Backend):
+    """
+    Native counterparts of `a`, `z` and `d` in the given backend, used inside
+    the recursion. Only the last few backends are kept, as a new point or
+    vector backend is made for every evaluation.
+    """
+    _a, _z = backend.variables(("a", "z"))
+    return _a, _z, (_a + 1 / _a) / _z - 1
+
+
+def _truncated(backend: Backend, value, z_max: int | None):
+    return value if z_max is None else backend.truncate(value, z_max)
+
+
+# L(mirror)(a, z) = L(1/a, z) and L does not depend on the orientation
+@polynomial_wrapper(
+    optimizations={'expand', 'packed', 'relabel', 'to_minimal', 'canonical'},
+    symmetries={'mirror': ((1, -1), (1, 1)), 'reverse': IDENTITY},
+)
 @log_input_output
-@cache
-def kauffman_polynomial(link: SGCode) -> Poly:
+@SkeinCache(max_bytes=DEFAULT_MAX_BYTES)
+def _kauffman_polynomial(link: SGCode, backend: Backend, z_max: int | None = None):
+    """
+    With `z_max` only the terms up to z^z_max are computed. The z-degree of
+    every term of L is at least 1 - (number of components), so the branches that
+    cannot reach below the truncation are pruned right away, and each splice
+    lowers the truncation of its branch by one as it gets multiplied by z.
+    """
     depth_print("ℹ️  not cached...")
 
-    if len(link.components) == 0:
-        return 0
+    _a, _z, _d = _variables(backend)
+
+    if link.components_count() == 0:
+        return backend.constant(0)
+
+    if z_max is not None and z_max < 1 - link.components_count():
+        depth_print("ℹ️  pruned by truncation")
+        return backend.constant(0)
 
     component_groups = link.overlies_decomposition()
 
@@ -30,31 +63,41 @@ def kauffman_polynomial(link: SGCode) -> Poly:
 
         if unknot_index == False or unknot_index_rev == False:
             depth_print("ℹ️  standard unknot form")
-            return a ** link.writhe()
+            return _a ** link.writhe()
         else:
             depth_print(f"ℹ️  applying skein")
-            link_switched = link.switch_crossing(unknot_index)
-            link_spliced_h = link_switched.splice_h(unknot_index)
-            link_spliced_v = link_switched.splice_v(unknot_index)
+            link_switched, link_spliced_h, link_spliced_v = link.skein_children(unknot_index)
+
+            z_max_spliced = None if z_max is None else z_max - 1
 
             depth_print(f"ℹ️  splice h, lambda = [{unknot_index}...]")
-            k_link_spliced_h = kauffman_polynomial(link_spliced_h)
+            k_link_spliced_h = _kauffman_polynomial(
+                link_spliced_h, backend, z_max=z_max_spliced
+            )
 
             depth_print(f"ℹ️  splice v, lambda = [{unknot_index}...]")
-            k_link_spliced_v = kauffman_polynomial(link_spliced_v)
+            k_link_spliced_v = _kauffman_polynomial(
+                link_spliced_v, backend, z_max=z_max_spliced
+            )
 
             depth_print(f"ℹ️  switch, lambda = [{unknot_index}...]")
-            k_link_switched = kauffman_polynomial(link_switched)
+            k_link_switched = _kauffman_polynomial(
+                link_switched, backend, z_max=z_max
+            )
 
-            return (
-                z * (k_link_spliced_h + k_link_spliced_v)
+            return _truncated(backend, (
+                _z * (k_link_spliced_h + k_link_spliced_v)
                 - k_link_switched
-            )
+            ), z_max)
 
     else:
         depth_print(f"ℹ️  split link: {component_groups}")
 
-        result = 1
+        # lowest z-degree of the whole product: each group contributes at least
+        # 1 - (its components) and each factor d contributes z^-1
+        min_z = sum(1 - len(ids) for ids in component_groups) - (len(component_groups) - 1)
+
+        result = backend.constant(1)
         for k, component_ids in enumerate(component_groups):
             # own_crossings = set(
             #     crossing.id
@@ -84,12 +127,61 @@ def kauffman_polynomial(link: SGCode) -> Poly:
             new_link = link.sublink(component_ids)
 
             if k > 0:
-                result *= d
-
-            result *= kauffman_polynomial(new_link)
-
-        return result
+                result *= _d
 
+            # the other factors raise the z-degree of this one by at least
+            # min_z - (1 - len(component_ids))
+            z_max_group = (
+                None if z_max is None
+                else z_max - min_z + 1 - len(component_ids)
+            )
 
-def f_polynomial(link: SGCode) -> Poly:
-    return (a ** (-link.writhe())) * kauffman_polynomial(link)
+            result *= _kauffman_polynomial(new_link, backend, z_max=z_max_group)
+
+        return _truncated(backend, result, z_max)
+
+
+def kauffman_polynomial(
+    link: SGCode,
+    backend: Backend | BackendName | None = None,
+    point: tuple[Any, Any] | None = None,
+    z_max: int | None = None,
+) -> Poly:
+    """
+    Computes the Kauffman L polynomial L(a, z) of the given link.
+
+    With `point = (a0, z0)` the recursion runs on the numbers themselves (e.g.
+    `Fraction`, `modular.ModInt` or `complex`) and the value L(a0, z0) is
+    returned, no polynomial is built.
+
+    With `z_max` only the terms up to z^z_max are computed, whole branches of
+    the skein tree that only contribute higher powers of z are skipped.
+    """
+    backend = get_backend(backend, point)
+    return backend.to_sympy(_kauffman_polynomial(link, backend, z_max=z_max), (a, z))
+
+
+def f_polynomial(
+    link: SGCode,
+    backend: Backend | BackendName | None = None,
+    point: tuple[Any, Any] | None = None,
+    z_max: int | None = None,
+) -> Poly:
+    """
+    Computes the Kauffman F polynomial F(a, z) = a^(-w) L(a, z) of the given link,
+    or its value at `point`, or its terms up to z^z_max (see `kauffman_polynomial`).
+    """
+    backend = get_backend(backend, point)
+    _a, _, _ = _variables(backend)
+    return backend.to_sympy(
+        _a ** (-link.writhe()) * _kauffman_polynomial(link, backend, z_max=z_max),
+        (a, z)
+    )
+
+
+def cache_stats() -> CacheStats:
+    """
+    Hits, misses and sizes of the caches of the L and F recursion in this
+    process, by crossings and by depth, see `skein_cache.CacheStats`.
+    """
+    return _kauffman_polynomial.cache_stats()
@@ -1,4 +1,5 @@
 from codes import SGCode, PDCode
+from codes_test import K5_2
 from kauffman import kauffman_polynomial, f_polynomial
 from sympy import Poly, symbols, simplify, init_printing
 
@@ -830,3 +831,20 @@ def test_kauffman_K8_18_3():
     # a**5*z**3 - 3*a**5*z + 3*a**5/z - a**5/z**3 - 3*a**4*z**4 + 13*a**4*z**2 - 14*a**4 + 5*a**4/z**2 + 7*a**3*z**5 - 16*a**3*z**3 + 9*a**3*z + 5*a**3/z - 5*a**3/z**3 + 6*a**2*z**6 - 17*a**2*z**4 + 37*a**2*z**2 - 46*a**2 + 20*a**2/z**2 + 3*a*z**7 + 12*a*z**5 - 45*a*z**3 + 40*a*z - 10*a/z**3 + 12*z**6 - 28*z**4 + 48*z**2 - 63 + 30/z**2 + 3*z**7/a + 12*z**5/a - 45*z**3/a + 40*z/a - 10/(a*z**3) + 6*z**6/a**2 - 17*z**4/a**2 + 37*z**2/a**2 - 46/a**2 + 20/(a**2*z**2) + 7*z**5/a**3 - 16*z**3/a**3 + 9*z/a**3 + 5/(a**3*z) - 5/(a**3*z**3) - 3*z**4/a**4 + 13*z**2/a**4 - 14/a**4 + 5/(a**4*z**2) + z**3/a**5 - 3*z/a**5 + 3/(a**5*z) - 1/(a**5*z**3)
 
     assert kL_K8_18 == kL_K8_18_expected
+
+
+def test_f_polynomial_truncated():
+    from laurent import LaurentPolynomial
+
+    links = [
+        K5_2,
+        SGCode.from_tuples([[(1, +1), (-2, +1)], [(-1, +1), (2, +1)], []]),
+    ]
+
+    for link in links:
+        for poly_fn in (f_polynomial, kauffman_polynomial):
+            full = LaurentPolynomial.from_sympy(poly_fn(link), a, z)
+
+            for z_max in range(-3, 6):
+                truncated = poly_fn(link, z_max=z_max, backend='laurent')
+                assert truncated == full.truncate(z_max).to_sympy(a, z)
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import sympy
+
+from sympy import Expr
+
+
+Exponents = tuple[int, int]
+
+
+class LaurentPolynomial:
+    """
+    A Laurent polynomial in two variables with integer coefficients.
+
+    The polynomial is stored as a sparse dict mapping each exponent pair `(i, j)`
+    to the coefficient of `x^i y^j`, zero coefficients are never stored. For the
+    Kauffman polynomial the variables are `(a, z)` and for the HOMFLY polynomial
+    they are `(v, z)`, the class itself does not know their names.
+
+    Instances are treated as immutable, all operations return new polynomials,
+    so results can be safely shared between cache entries.
+    """
+
+    __slots__ = ('terms',)
+
+    terms: dict[Exponents, int]
+
+    def __init__(self, terms: dict[Exponents, int] | None = None):
+        self.terms = {
+            exponents: coeff
+            for exponents, coeff in (terms or {}).items()
+            if coeff != 0
+        }
+
+    @staticmethod
+    def _from_terms(terms: dict[Exponents, int]) -> LaurentPolynomial:
+        """
+        Build a polynomial from a dict that is already free of zero coefficients,
+        without copying it.
+        """
+        poly = LaurentPolynomial.__new__(LaurentPolynomial)
+        poly.terms = terms
+        return poly
+
+    @staticmethod
+    def constant(c: int) -> LaurentPolynomial:
+        return LaurentPolynomial._from_terms({(0, 0): c} if c != 0 else {})
+
+    @staticmethod
+    def monomial(i: int, j: int, c: int = 1) -> LaurentPolynomial:
+        """
+        Return the monomial `c x^i y^j`.
+        """
+        return LaurentPolynomial._from_terms({(i, j): c} if c != 0 else {})
+
+    @staticmethod
+    def coerce(value: LaurentPolynomial | int) -> LaurentPolynomial:
+        if isinstance(value, LaurentPolynomial):
+            return value
+        if isinstance(value, int):
+            return LaurentPolynomial.constant(value)
+
+        raise TypeError(f"Unsupported type: {type(value)}")
+
+    def is_zero(self) -> bool:
+        return len(self.terms) == 0
+
+    def is_monomial(self) -> bool:
+        return len(self.terms) == 1
+
+    def shift(self, i: int, j: int) -> LaurentPolynomial:
+        """
+        Multiply by the monomial `x^i y^j`, this only moves the exponents.
+        """
+        if i == 0 and j == 0:
+            return self
+
+        return LaurentPolynomial._from_terms({
+            (ei + i, ej + j): c
+            for (ei, ej), c in self.terms.items()
+        })
+
+    def scale(self, c: int) -> LaurentPolynomial:
+        """
+        Multiply all coefficients by the integer `c`.
+        """
+        if c == 0:
+            return LaurentPolynomial()
+        if c == 1:
+            return self
+
+        return LaurentPolynomial._from_terms({
+            exponents: coeff * c
+            for exponents, coeff in self.terms.items()
+        })
+
+    def truncate(self, max_j: int) -> LaurentPolynomial:
+        """
+        Drop all the terms `x^i y^j` with `j > max_j`.
+        """
+        if all(j <= max_j for _, j in self.terms):
+            return self
+
+        return LaurentPolynomial._from_terms({
+            (i, j): coeff
+            for (i, j), coeff in self.terms.items()
+            if j <= max_j
+        })
+
+    def substitute(
+        self, x_map: tuple[int, int], y_map: tuple[int, int]
+    ) -> LaurentPolynomial:
+        """
+        Substitute `x -> sx x^ex` and `y -> sy y^ey`, where `x_map = (sx, ex)`,
+        `y_map = (sy, ey)` and the signs are +1 or -1.
+        """
+        (sx, ex), (sy, ey) = x_map, y_map
+        return LaurentPolynomial._from_terms({
+            (ex * i, ey * j): coeff * sx ** (i % 2) * sy ** (j % 2)
+            for (i, j), coeff in self.terms.items()
+        })
+
+    def __add__(self, other: LaurentPolynomial | int) -> LaurentPolynomial:
+        if isinstance(other, int):
+            other = LaurentPolynomial.constant(other)
+        elif not isinstance(other, LaurentPolynomial):
+            return NotImplemented
+
+        # iterate over the smaller polynomial
+        big, small = (
+            (self, other) if len(self.terms) >= len(other.terms)
+            else (other, self)
+        )
+
+        terms = big.terms.copy()
+        for exponents, coeff in small.terms.items():
+            c = terms.get(exponents, 0) + coeff
+            if c == 0:
+                del terms[exponents]
+            else:
+                terms[exponents] = c
+
+        return LaurentPolynomial._from_terms(terms)
+
+    def __radd__(self, other: int) -> LaurentPolynomial:
+        return self + other
+
+    def __neg__(self) -> LaurentPolynomial:
+        return self.scale(-1)
+
+    def __sub__(self, other: LaurentPolynomial | int) -> LaurentPolynomial:
+        if isinstance(other, int):
+            return self + (-other)
+        elif not isinstance(other, LaurentPolynomial):
+            return NotImplemented
+
+        return self + (-other)
+
+    def __rsub__(self, other: int) -> LaurentPolynomial:
+        return (-self) + other
+
+    def __mul__(self, other: LaurentPolynomial | int) -> LaurentPolynomial:
+        if isinstance(other, int):
+            return self.scale(other)
+        elif not isinstance(other, LaurentPolynomial):
+            return NotImplemented
+
+        # multiplying by a monomial only moves the exponents
+        if len(self.terms) == 1:
+            self, other = other, self
+        if len(other.terms) == 1:
+            ((i, j), c), = other.terms.items()
+            return LaurentPolynomial._from_terms({
+                (ei + i, ej + j): coeff * c
+                for (ei, ej), coeff in self.terms.items()
+            })
+
+        terms: dict[Exponents, int] = {}
+        for (i1, j1), c1 in self.terms.items():
+            for (i2, j2), c2 in other.terms.items():
+                exponents = (i1 + i2, j1 + j2)
+                terms[exponents] = terms.get(exponents, 0) + c1 * c2
+
+        return LaurentPolynomial(terms)
+
+    def __rmul__(self, other: int) -> LaurentPolynomial:
+        return self * other
+
+    def __pow__(self, n: int) -> LaurentPolynomial:
+        if len(self.terms) == 1:
+            ((i, j), c), = self.terms.items()
+            if n < 0 and c not in (1, -1):
+                raise ValueError(
+                    f"Cannot invert the monomial {self} over the integers"
+                )
+            return LaurentPolynomial.monomial(i * n, j * n, c ** abs(n))
+
+        if n < 0:
+            raise ValueError(f"Cannot invert the polynomial {self}")
+
+        result = LaurentPolynomial.constant(1)
+        base = self
+        while n > 0:
+            if n & 1:
+                result = result * base
+            base = base * base
+            n >>= 1
+
+        return result
+
+    def __truediv__(self, other: LaurentPolynomial | int) -> LaurentPolynomial:
+        """
+        Division is only supported by invertible monomials, i.e. `±x^i y^j`.
+        """
+        if isinstance(other, int):
+            other = LaurentPolynomial.constant(other)
+        elif not isinstance(other, LaurentPolynomial):
+            return NotImplemented
+
+        return self * other ** -1
+
+    def __rtruediv__(self, other: int) -> LaurentPolynomial:
+        return LaurentPolynomial.constant(other) / self
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, int):
+            other = LaurentPolynomial.constant(other)
+        elif not isinstance(other, LaurentPolynomial):
+            return NotImplemented
+
+        return self.terms == other.terms
+
+    def __hash__(self):
+        return hash(frozenset(self.terms.items()))
+
+    def to_sympy(self, x: Expr, y: Expr) -> Expr:
+        """
+        Convert to an expanded SymPy expression in the variables `x` and `y`.
+        """
+        return sympy.Add(*(
+            c * x ** i * y ** j
+            for (i, j), c in sorted(self.terms.items())
+        ))
+
+    @staticmethod
+    def from_sympy(expr: Expr, x: Expr, y: Expr) -> LaurentPolynomial:
+        """
+        Convert a SymPy expression that expands to a Laurent polynomial with
+        integer coefficients in the variables `x` and `y`.
+        """
+        terms: dict[Exponents, int] = {}
+
+        for monomial, coeff in sympy.expand(expr).as_coefficients_dict().items():
+            if not coeff.is_Integer:
+                raise ValueError(f"Non-integer coefficient {coeff} in {expr}")
+
+            powers = monomial.as_powers_dict()
+            if any(
+                (base != x and base != y) and base != 1
+                for base in powers
+            ):
+                raise ValueError(f"Not a Laurent polynomial in {x}, {y}: {expr}")
+
+            exponents = (int(powers.get(x, 0)), int(powers.get(y, 0)))
+            terms[exponents] = terms.get(exponents, 0) + int(coeff)
+
+        return LaurentPolynomial(terms)
+
+    def __str__(self):
+        if not self.terms:
+            return "0"
+
+        return " + ".join(
+            f"{c} x^{i} y^{j}"
+            for (i, j), c in sorted(self.terms.items())
+        )
+
+    def __repr__(self):
+        return f"LaurentPolynomial({self.terms!r})"
@@ -0,0 +1,42 @@
+import pytest
+
+from laurent import LaurentPolynomial
+from sympy import symbols
+
+
+a, z = symbols("a z")
+
+_a = LaurentPolynomial.monomial(1, 0)
+_z = LaurentPolynomial.monomial(0, 1)
+
+
+def test_laurent_arithmetic():
+    p = (_a + 1 / _a) / _z - 1
+
+    assert p.to_sympy(a, z) == ((a + 1 / a) / z - 1).expand()
+    assert (p * p).to_sympy(a, z) == (((a + 1 / a) / z - 1) ** 2).expand()
+    assert (p ** 3).to_sympy(a, z) == (((a + 1 / a) / z - 1) ** 3).expand()
+
+
+def test_laurent_cancellation():
+    p = _z * (_a + _a ** -1) - _a * _z
+
+    assert p == _a ** -1 * _z
+    assert p - p == 0
+    assert (p - p).is_zero()
+    assert (p - p).to_sympy(a, z) == 0
+
+
+def test_laurent_constants():
+    assert LaurentPolynomial.constant(1) == 1
+    assert LaurentPolynomial.constant(1).to_sympy(a, z) == 1
+    assert 2 * _a - _a == _a
+    assert 1 - _a + _a == 1
+
+
+def test_laurent_monomial_division():
+    assert (_a ** 2 * _z) / _a == _a * _z
+    assert 1 / (_a * _z) == _a ** -1 * _z ** -1
+
+    with pytest.raises(ValueError):
+        _ = 1 / (_a + _z)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class ModVector:
+    """
+    A vector of integers modulo the prime `p`, stored as an int64 NumPy array.
+
+    This is the vectorized counterpart of `modular.ModInt`: one entry per sample
+    point, so a single run of a skein recursion evaluates the invariant at all
+    the points at once. The primes in `modular.PRIMES` are below 2^31, so the
+    product of two residues always fits in an int64.
+
+    Arrays are never modified in place, so instances can be shared. Inverses
+    use Fermat's little theorem, so they are only meaningful when no
+    entry is zero modulo `p`.
+    """
+
+    __slots__ = ('values', 'p')
+
+    values: np.ndarray
+    p: int
+
+    def __init__(self, values: np.ndarray, p: int):
+        self.values = np.asarray(values, dtype=np.int64) % p
+        self.p = p
+
+    @staticmethod
+    def _from_reduced(values: np.ndarray, p: int) -> ModVector:
+        result = object.__new__(ModVector)
+        result.values = values
+        result.p = p
+        return result
+
+    def _coerce(self, other: ModVector | int) -> np.ndarray | int | None:
+        if isinstance(other, ModVector):
+            assert other.p == self.p, "Mixed moduli"
+            return other.values
+        if isinstance(other, int):
+            return other % self.p
+
+        return None
+
+    def __len__(self):
+        return len(self.values)
+
+    def __add__(self, other: ModVector | int) -> ModVector:
+        values = self._coerce(other)
+        if values is None:
+            return NotImplemented
+        return ModVector._from_reduced((self.values + values) % self.p, self.p)
+
+    def __radd__(self, other: int) -> ModVector:
+        return self + other
+
+    def __neg__(self) -> ModVector:
+        return ModVector._from_reduced(-self.values % self.p, self.p)
+
+    def __sub__(self, other: ModVector | int) -> ModVector:
+        values = self._coerce(other)
+        if values is None:
+            return NotImplemented
+        return ModVector._from_reduced((self.values - values) % self.p, self.p)
+
+    def __rsub__(self, other: int) -> ModVector:
+        return -self + other
+
+    def __mul__(self, other: ModVector | int) -> ModVector:
+        values = self._coerce(other)
+        if values is None:
+            return NotImplemented
+        return ModVector._from_reduced(self.values * values % self.p, self.p)
+
+    def __rmul__(self, other: int) -> ModVector:
+        return self * other
+
+    def __pow__(self, n: int) -> ModVector:
+        base = self if n >= 0 else self.inverse()
+        n = abs(n)
+
+        # square and multiply, on all the entries at once
+        result = np.ones_like(self.values)
+        power = base.values
+        while n > 0:
+            if n & 1:
+                result = result * power % self.p
+            power = power * power % self.p
+            n >>= 1
+
+        return ModVector._from_reduced(result, self.p)
+
+    def inverse(self) -> ModVector:
+        return self ** (self.p - 2)
+
+    def __truediv__(self, other: ModVector | int) -> ModVector:
+        if isinstance(other, int):
+            return self * pow(other, -1, self.p)
+        if isinstance(other, ModVector):
+            return self * other.inverse()
+
+        return NotImplemented
+
+    def __rtruediv__(self, other: int) -> ModVector:
+        return self.inverse() * other
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ModVector):
+            return self.p == other.p and np.array_equal(self.values, other.values)
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.p, self.values.tobytes()))
+
+    def __str__(self):
+        return f"{self.values} (mod {self.p})"
+
+    def __repr__(self):
+        return f"ModVector({self.values!r}, {self.p})"
@@ -0,0 +1,32 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from modular import ModInt
+from mod_vector import ModVector
+
+
+P = 2147483629
+
+
+def test_mod_vector_matches_mod_int():
+    xs = [2, 3, 5, 1234567, P - 1]
+    v = ModVector(np.array(xs), P)
+
+    cases = [
+        (v * v + 3, lambda x: x * x + 3),
+        (v ** -3 - v, lambda x: x ** -3 - x),
+        (1 / v * 7, lambda x: 1 / x * 7),
+        ((v + 1) / v, lambda x: (x + 1) / x),
+        (2 - v ** 5, lambda x: 2 - x ** 5),
+    ]
+
+    for result, expected in cases:
+        assert result.values.tolist() == [
+            int(expected(ModInt(x, P))) for x in xs
+        ]
+
+
+def test_mod_vector_equality():
+    assert ModVector(np.array([1, 2]), P) == ModVector(np.array([1 + P, 2]), P)
+    assert ModVector(np.array([1, 2]), P) != ModVector(np.array([1, 3]), P)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+
+# Primes just below 2^31, products of two residues fit in a signed 64-bit word
+PRIMES = [
+    2147483647, 2147483629, 2147483587, 2147483579,
+    2147483563, 2147483549, 2147483543, 2147483497,
+]
+
+
+class ModInt:
+    """
+    An integer modulo the prime `p`.
+
+    Mixed operations with plain ints are supported, so a `ModInt` can be used as
+    the value of a polynomial variable and the skein recursions run unchanged.
+    Negative powers and divisions use the modular inverse.
+    """
+
+    __slots__ = ('value', 'p')
+
+    value: int
+    p: int
+
+    def __init__(self, value: int, p: int):
+        self.value = value % p
+        self.p = p
+
+    def _coerce(self, other: ModInt | int) -> int | None:
+        if isinstance(other, ModInt):
+            assert other.p == self.p, "Mixed moduli"
+            return other.value
+        if isinstance(other, int):
+            return other
+
+        return None
+
+    def __add__(self, other: ModInt | int) -> ModInt:
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return ModInt(self.value + value, self.p)
+
+    def __radd__(self, other: int) -> ModInt:
+        return self + other
+
+    def __neg__(self) -> ModInt:
+        return ModInt(-self.value, self.p)
+
+    def __sub__(self, other: ModInt | int) -> ModInt:
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return ModInt(self.value - value, self.p)
+
+    def __rsub__(self, other: int) -> ModInt:
+        return ModInt(other - self.value, self.p)
+
+    def __mul__(self, other: ModInt | int) -> ModInt:
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return ModInt(self.value * value, self.p)
+
+    def __rmul__(self, other: int) -> ModInt:
+        return self * other
+
+    def __pow__(self, n: int) -> ModInt:
+        return ModInt(pow(self.value, n, self.p), self.p)
+
+    def __truediv__(self, other: ModInt | int) -> ModInt:
+        value = self._coerce(other)
+        if value is None:
+            return NotImplemented
+        return ModInt(self.value * pow(value, -1, self.p), self.p)
+
+    def __rtruediv__(self, other: int) -> ModInt:
+        return ModInt(other * pow(self.value, -1, self.p), self.p)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ModInt):
+            return self.p == other.p and self.value == other.value
+        if isinstance(other, int):
+            return self.value == other % self.p
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.value, self.p))
+
+    def __int__(self):
+        return self.value
+
+    def __str__(self):
+        return f"{self.value} (mod {self.p})"
+
+    def __repr__(self):
+        return f"ModInt({self.value}, {self.p})"
+
+
+def symmetric_residue(value: int, modulus: int) -> int:
+    """
+    Return the representative of `value` modulo `modulus` in `(-modulus/2, modulus/2]`.
+    """
+    value %= modulus
+    return value - modulus if value > modulus // 2 else value
+
+
+def crt(r1: int, m1: int, r2: int, m2: int) -> tuple[int, int]:
+    """
+    Combine `x = r1 (mod m1)` and `x = r2 (mod m2)` for coprime moduli, returns
+    the residue modulo `m1 * m2` and the new modulus.
+    """
+    t = (r2 - r1) * pow(m1, -1, m2) % m2
+    return r1 + m1 * t, m1 * m2
+
+
+def interpolate_mod(xs: list[int], ys: list[int], p: int) -> list[int]:
+    """
+    Return the coefficients `c[0], ..., c[n-1]` (lowest degree first) of the
+    unique polynomial of degree less than `n = len(xs)` through the points
+    `(xs[k], ys[k])` modulo `p`, using Newton divided differences.
+    """
+    n = len(xs)
+    assert n == len(ys) and n > 0
+
+    # divided differences, in place
+    dd = [y % p for y in ys]
+    for k in range(1, n):
+        for i in range(n - 1, k - 1, -1):
+            dd[i] = (dd[i] - dd[i - 1]) * pow(xs[i] - xs[i - k], -1, p) % p
+
+    # expand the Newton form from the innermost term (Horner-like)
+    coeffs = [0] * n
+    coeffs[0] = dd[n - 1]
+    for k in range(n - 2, -1, -1):
+        # coeffs = coeffs * (x - xs[k]) + dd[k]
+        for i in range(n - 1, 0, -1):
+            coeffs[i] = (coeffs[i - 1] - xs[k] * coeffs[i]) % p
+        coeffs[0] = (dd[k] - xs[k] * coeffs[0]) % p
+
+    return coeffs
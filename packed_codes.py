@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import functools
+
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Literal
+
+from codes import (
+    HANDED_LEFT, HANDED_RIGHT, SGCode, SGCodeCrossing, Sign,
+    canonical_values, crossing_masks, normalized_values
+)
+from graphs import Graph, find_roots
+
+
+class PackedSGCode:
+    """
+    A signed Gauss code stored in two flat integer arrays: the values of the
+    crossings of all the components one after the other (see
+    `codes.crossing_value`) and the offsets where each component starts, with
+    the total length at the end.
+
+    It has the API of `SGCode` used by the skein recursions, and the operations
+    that build new diagrams (switches, splices, sublinks, ...) work on the
+    arrays directly without creating any `SGCodeCrossing`. The `components`
+    are still available as a view, and `to_sgcode()` converts back. Packed and
+    object codes of the same diagram are equal and have the same hash.
+    """
+
+    __slots__ = ('crossings', 'offsets', '__dict__')
+
+    crossings: array
+    offsets: array
+
+    def __init__(self, crossings: array, offsets: array):
+        self.crossings = crossings
+        self.offsets = offsets
+
+    @staticmethod
+    def from_components(components: Iterable[Iterable[int]]) -> PackedSGCode:
+        crossings = array('i')
+        offsets = array('i', [0])
+        for component in components:
+            crossings.extend(component)
+            offsets.append(len(crossings))
+
+        return PackedSGCode(crossings, offsets)
+
+    @staticmethod
+    def from_sgcode(link: SGCode) -> PackedSGCode:
+        return PackedSGCode.from_components(link.values())
+
+    def to_sgcode(self) -> SGCode:
+        return SGCode.from_values(self._components())
+
+    def values(self) -> list[array]:
+        return self._components()
+
+    def _components(self) -> list[array]:
+        crossings, offsets = self.crossings, self.offsets
+        return [
+            crossings[offsets[i]:offsets[i + 1]]
+            for i in range(len(offsets) - 1)
+        ]
+
+    def _component_of(self, position: int) -> int:
+        return bisect_right(self.offsets, position) - 1
+
+    @functools.cached_property
+    def components(self) -> list[list[SGCodeCrossing]]:
+        return self.to_sgcode().components
+
+    @functools.cached_property
+    def crossing_index(self) -> dict[int, tuple[int, int]]:
+        """
+        For each crossing id the positions of its over and under occurrences
+        in `crossings`.
+        """
+        over: dict[int, int] = {}
+        under: dict[int, int] = {}
+        for k, value in enumerate(self.crossings):
+            if value & 2:
+                over[value >> 2] = k
+            else:
+                under[value >> 2] = k
+
+        return {id: (k, under[id]) for id, k in over.items()}
+
+    @functools.cached_property
+    def packed(self) -> bytes:
+        """
+        The same bytes as `SGCode.packed`.
+        """
+        values = [len(self.offsets) - 1]
+        for component in self._components():
+            values.append(len(component))
+            values += [
+                x
+                for value in component
+                for x in (
+                    value >> 2 if value & 2 else -(value >> 2),
+                    HANDED_LEFT if value & 1 else HANDED_RIGHT,
+                )
+            ]
+
+        return array('i', values).tobytes()
+
+    @functools.cached_property
+    def _hash(self) -> int:
+        return hash(self.packed)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, PackedSGCode):
+            return self is other or (
+                self.offsets == other.offsets and self.crossings == other.crossings
+            )
+        if isinstance(other, SGCode):
+            return self.packed == other.packed
+
+        return NotImplemented
+
+    def __reduce__(self):
+        return PackedSGCode, (self.crossings, self.offsets)
+
+    def __str__(self):
+        return f"{self.components}"
+
+    def __repr__(self):
+        return f"{self.components}"
+
+    def components_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def crossings_count(self) -> int:
+        return len(self.crossings) // 2
+
+    def writhe(self) -> int:
+        left = sum(value & 1 for value in self.crossings)
+        return (2 * left - len(self.crossings)) // 2
+
+    def relabel(self) -> PackedSGCode:
+        """
+        See `SGCode.relabel`, the new ids are given in the same order.
+        """
+        crossing_ids = {value >> 2 for value in self.crossings}
+        id_mapping = {
+            old_id: new_id
+            for new_id, old_id in enumerate(crossing_ids, start=1)
+        }
+
+        return PackedSGCode(array('i', [
+            4 * id_mapping[value >> 2] + (value & 3)
+            for value in self.crossings
+        ]), self.offsets)
+
+    def to_minimal(self) -> PackedSGCode:
+        """
+        See `SGCode.to_minimal`, crossings compare over first and then by id.
+        """
+        components = []
+        for component in self._components():
+            if len(component) > 0:
+                k = min(range(len(component)), key=lambda k: (~component[k] & 2, component[k] >> 2))
+                component = component[k:] + component[:k]
+            components.append(component)
+
+        return PackedSGCode.from_components(components)
+
+    def normalized(self) -> PackedSGCode:
+        return PackedSGCode.from_components(normalized_values(self._components()))
+
+    def canonical(self, max_candidates: int = 64) -> PackedSGCode:
+        return PackedSGCode.from_components(
+            canonical_values(self._components(), max_candidates)
+        )
+
+    def reverse(self, ids: Literal['*'] | list[int] = '*') -> PackedSGCode:
+        if ids != '*':
+            return PackedSGCode.from_sgcode(self.to_sgcode().reverse(ids))
+
+        return PackedSGCode.from_components(
+            component[::-1] for component in self._components()
+        )
+
+    def mirror(self) -> PackedSGCode:
+        return PackedSGCode.from_components(
+            [value ^ 3 for value in reversed(component)]
+            for component in self._components()
+        )
+
+    def switch_crossing(self, id: int) -> PackedSGCode:
+        over_position, under_position = self.crossing_index[id]
+
+        crossings = array('i', self.crossings)
+        crossings[over_position] ^= 3
+        crossings[under_position] ^= 3
+        return PackedSGCode(crossings, self.offsets)
+
+    def apply_switching_sequence(self, switching_sequence: list[int]) -> PackedSGCode:
+        switched = set(switching_sequence)
+        return PackedSGCode(array('i', [
+            value ^ 3 if value >> 2 in switched else value
+            for value in self.crossings
+        ]), self.offsets)
+
+    def first_switch_to_std_unknot(self) -> int | bool:
+        visited: set[int] = set()
+        for value in self.crossings:
+            id = value >> 2
+            if id not in visited and not value & 2:
+                return id
+            visited.add(id)
+
+        return False
+
+    def get_crossing_handedness(self, id: int) -> Sign:
+        over_position, _ = self.crossing_index[id]
+        return HANDED_LEFT if self.crossings[over_position] & 1 else HANDED_RIGHT
+
+    def overlies_decomposition(self) -> list[list[int]]:
+        """
+        See `SGCode.overlies_decomposition`.
+        """
+        n = len(self.offsets) - 1
+
+        # graph where "i -> j" iff "i overlies j"
+        graph_of_overlies: Graph[int] = {i: set() for i in range(n)}
+        for over_position, under_position in self.crossing_index.values():
+            i = self._component_of(over_position)
+            j = self._component_of(under_position)
+            if i != j:
+                graph_of_overlies[i].add(j)
+
+        roots = find_roots(graph_of_overlies)
+
+        result = [[i] for i in roots]
+        if len(roots) < n:
+            result.append([i for i in range(n) if i not in roots])
+
+        return result
+
+    def sublink(self, component_ids: list[int]) -> PackedSGCode:
+        """
+        See `SGCode.sublink`.
+        """
+        components = self._components()
+
+        over_ids, under_ids = crossing_masks(
+            value for i in component_ids for value in components[i]
+        )
+        own_ids = over_ids & under_ids
+
+        return PackedSGCode.from_components(
+            [value for value in components[i] if own_ids >> (value >> 2) & 1]
+            for i in component_ids
+        )
+
+    def _splice_strands(
+        self, over_position: int, under_position: int
+    ) -> tuple[list[array], tuple[array, ...]]:
+        """
+        What a splice at the crossing with the given occurrences reconnects: the
+        components not through the crossing, and the pieces of the ones through
+        it cut at the two occurrences, `(l1, l2, l3)` for a single component and
+        `(l1, l2, m1, m2)` for the over and the under components.
+        """
+        crossings, offsets = self.crossings, self.offsets
+        over_component = self._component_of(over_position)
+        under_component = self._component_of(under_position)
+
+        others = [
+            crossings[offsets[i]:offsets[i + 1]]
+            for i in range(len(offsets) - 1)
+            if i != over_component and i != under_component
+        ]
+
+        if over_component == under_component:
+            start, end = offsets[over_component], offsets[over_component + 1]
+            first_split, second_split = sorted((over_position, under_position))
+            return others, (
+                crossings[start:first_split],
+                crossings[first_split + 1:second_split],
+                crossings[second_split + 1:end],
+            )
+
+        over_start, over_end = offsets[over_component], offsets[over_component + 1]
+        under_start, under_end = offsets[under_component], offsets[under_component + 1]
+        return others, (
+            crossings[over_start:over_position],
+            crossings[over_position + 1:over_end],
+            crossings[under_start:under_position],
+            crossings[under_position + 1:under_end],
+        )
+
+    @staticmethod
+    def _join(others: list[array], pieces: tuple[array, ...], twisted: bool) -> PackedSGCode:
+        """
+        The splice from the strands of `_splice_strands`. The plain one joins
+        the pieces as they are, the twisted one reverses the pieces between the
+        two occurrences, which flips the handedness of the crossings they share
+        with the rest of the diagram.
+        """
+        def update_signs(strand: Iterable[int], flipped: int) -> list[int]:
+            return [
+                value ^ 1 if flipped >> (value >> 2) & 1 else value
+                for value in strand
+            ]
+
+        def non_self_ids(*strands: array) -> int:
+            over_ids, under_ids = crossing_masks(value for strand in strands for value in strand)
+            return over_ids ^ under_ids
+
+        if len(pieces) == 3:
+            l1, l2, l3 = pieces
+            if not twisted:
+                return PackedSGCode.from_components([*others, l1 + l3, l2])
+
+            flipped = non_self_ids(l2)
+            return PackedSGCode.from_components([
+                *(update_signs(c, flipped) for c in others),
+                update_signs(l1, flipped)
+                + update_signs(reversed(l2), flipped)
+                + update_signs(l3, flipped),
+            ])
+
+        l1, l2, m1, m2 = pieces
+        if not twisted:
+            return PackedSGCode.from_components([*others, l1 + m2 + m1 + l2])
+
+        flipped = non_self_ids(m1, m2)
+        return PackedSGCode.from_components([
+            *(update_signs(c, flipped) for c in others),
+            update_signs(l1, flipped)
+            + update_signs(reversed(m1), flipped)
+            + update_signs(reversed(m2), flipped)
+            + update_signs(l2, flipped),
+        ])
+
+    def splice_h(self, id: int, orthogonal: Sign = +1) -> PackedSGCode:
+        """
+        See `SGCode.splice_h`, the resulting components are in the same order.
+        """
+        over_position, under_position = self.crossing_index[id]
+        handedness = HANDED_LEFT if self.crossings[over_position] & 1 else HANDED_RIGHT
+
+        return PackedSGCode._join(
+            *self._splice_strands(over_position, under_position),
+            twisted=handedness * orthogonal != HANDED_LEFT,
+        )
+
+    def splice_v(self, id: int) -> PackedSGCode:
+        return self.splice_h(id, orthogonal=-1)
+
+    def skein_children(self, id: int) -> tuple[PackedSGCode, PackedSGCode, PackedSGCode]:
+        """
+        See `SGCode.skein_children`. The diagrams are cut once, and the two
+        splices are both joined from the same strands.
+        """
+        over_position, under_position = self.crossing_index[id]
+
+        crossings = array('i', self.crossings)
+        crossings[over_position] ^= 3
+        crossings[under_position] ^= 3
+        switched = PackedSGCode(crossings, self.offsets)
+
+        # the switch swaps the over and under occurrences
+        switched.crossing_index = self.crossing_index | {id: (under_position, over_position)}
+
+        # after the switch the crossing has the opposite handedness, so the
+        # horizontal splice is the twisted one exactly when it was left handed
+        strands = switched._splice_strands(under_position, over_position)
+        twisted = bool(self.crossings[over_position] & 1)
+        return (
+            switched,
+            PackedSGCode._join(*strands, twisted=twisted),
+            PackedSGCode._join(*strands, twisted=not twisted),
+        )
@@ -0,0 +1,90 @@
+import pickle
+
+from codes import SGCode, PDCode
+from codes_test import LINK_1
+from packed_codes import PackedSGCode
+from kauffman import kauffman_polynomial
+from homfly import homfly_polynomial
+
+
+DIAGRAMS = [
+    # trefoil
+    PDCode.from_tuples(
+        [(3, 6, 4, 1), (5, 2, 6, 3), (1, 4, 2, 5)]
+    ).to_signed_gauss_code(),
+    # 6_2
+    PDCode.from_tuples([
+        (11, 3, 12, 2), (9, 5, 10, 4), (1, 6, 2, 7),
+        (3, 9, 4, 8), (5, 11, 6, 10), (7, 12, 8, 1)
+    ]).to_signed_gauss_code(),
+    LINK_1,
+    # hopf
+    SGCode.from_tuples([
+        [(+1, -1), (-2, -1)],
+        [(-1, -1), (+2, -1)],
+    ]),
+]
+
+
+def assert_same(packed: PackedSGCode, link: SGCode):
+    assert packed.to_sgcode() == link
+    assert packed == link and hash(packed) == hash(link)
+
+
+def test_round_trip():
+    for link in DIAGRAMS:
+        packed = PackedSGCode.from_sgcode(link)
+
+        assert_same(packed, link)
+        assert packed.components == link.components
+        assert pickle.loads(pickle.dumps(packed)) == packed
+
+
+def test_operations_match_sgcode():
+    # walk the skein trees of the diagrams and compare every operation
+    pending = [(PackedSGCode.from_sgcode(link), link) for link in DIAGRAMS]
+    seen = set()
+
+    while pending:
+        packed, link = pending.pop()
+        if link in seen:
+            continue
+        seen.add(link)
+
+        assert_same(packed, link)
+        assert packed.components_count() == link.components_count()
+        assert packed.crossings_count() == link.crossings_count()
+        assert packed.writhe() == link.writhe()
+        assert packed.first_switch_to_std_unknot() == link.first_switch_to_std_unknot()
+        assert packed.overlies_decomposition() == link.overlies_decomposition()
+
+        assert_same(packed.relabel(), link.relabel())
+        assert_same(packed.to_minimal(), link.to_minimal())
+        assert_same(packed.normalized(), link.normalized())
+        assert_same(packed.mirror(), link.mirror())
+        assert_same(packed.reverse(), link.reverse())
+        assert packed.canonical() == link.canonical()
+
+        for ids in link.overlies_decomposition():
+            pending.append((packed.sublink(ids), link.sublink(ids)))
+
+        ids = {c.id for component in link.components for c in component}
+        for id in ids:
+            assert packed.get_crossing_handedness(id) == link.get_crossing_handedness(id)
+            assert_same(packed.switch_crossing(id), link.switch_crossing(id))
+
+            for packed_child, child in zip(packed.skein_children(id), link.skein_children(id)):
+                assert_same(packed_child, child)
+
+        for id in list(ids)[:2]:
+            pending.append((packed.splice_h(id), link.splice_h(id)))
+            pending.append((packed.splice_v(id), link.splice_v(id)))
+            pending.append((packed.switch_crossing(id), link.switch_crossing(id)))
+
+
+def test_polynomials_match_sgcode():
+    for link in DIAGRAMS:
+        packed = PackedSGCode.from_sgcode(link)
+
+        assert kauffman_polynomial(packed) == kauffman_polynomial(link)
+        assert homfly_polynomial(packed) == homfly_polynomial(link)
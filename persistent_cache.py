@@ -0,0 +1,187 @@
+"""
+Persistent on-disk cache of the skein subproblems, shared across runs and
+processes.
+
+Results are stored in an SQLite file, keyed by the canonical form of the
+diagram (see `SGCode.canonical`) and by a namespace naming the recursion and its
+extra arguments, the values are the terms of the Laurent polynomial. The file
+uses write-ahead logging, so any number of processes can read while one writes,
+and writes are buffered and committed in batches.
+
+The schema and the encodings are versioned together with the canonical form,
+a file written by another version is cleared on open.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+
+from codes import SGCode
+from laurent import LaurentPolynomial
+
+
+# Bump when the schema, the encodings or `SGCode.canonical` change
+SCHEMA_VERSION = 1
+
+DEFAULT_BATCH_SIZE = 1000
+
+DEFAULT_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+    'kauffman-polynomial',
+    'skein-cache.sqlite',
+)
+
+
+def encode_link(link: SGCode) -> bytes:
+    """
+    A compact encoding of a diagram, its packed encoding (see `SGCode.pack`).
+    """
+    return link.packed
+
+
+def encode_polynomial(p: LaurentPolynomial) -> bytes:
+    return json.dumps(sorted(
+        (i, j, c) for (i, j), c in p.terms.items()
+    ), separators=(',', ':')).encode()
+
+
+def decode_polynomial(data: bytes) -> LaurentPolynomial:
+    return LaurentPolynomial({
+        (i, j): c for i, j, c in json.loads(data)
+    })
+
+
+class PersistentStore:
+    """
+    An SQLite store mapping (namespace, canonical diagram) to polynomials.
+
+    The connection is opened lazily and again after a fork, as SQLite
+    connections cannot be shared between processes. Pending writes are visible
+    to the process that made them and are committed every `batch_size` puts,
+    on `flush()` and at exit.
+    """
+
+    read_only = False
+
+    def __init__(self, path: str = DEFAULT_PATH, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._pending: dict[tuple[str, bytes], bytes] = {}
+
+        atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+
+        # after a fork the parent's connection and pending writes are not ours
+        self._pending = {}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            row = connection.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'"
+            ).fetchone()
+
+            if row is None or int(row[0]) != SCHEMA_VERSION:
+                connection.execute("DROP TABLE IF EXISTS entries")
+                connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)",
+                    (str(SCHEMA_VERSION),)
+                )
+
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key BLOB NOT NULL,
+                    value BLOB NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            """)
+
+        self._connection = connection
+        self._pid = os.getpid()
+        return connection
+
+    def get(self, namespace: str, link: SGCode) -> LaurentPolynomial | None:
+        key = (namespace, encode_link(link))
+
+        connection = self._connect()
+        if key in self._pending:
+            return decode_polynomial(self._pending[key])
+
+        row = connection.execute(
+            "SELECT value FROM entries WHERE namespace = ? AND key = ?", key
+        ).fetchone()
+
+        return None if row is None else decode_polynomial(row[0])
+
+    def put(self, namespace: str, link: SGCode, value: LaurentPolynomial):
+        self._connect()
+        self._pending[(namespace, encode_link(link))] = encode_polynomial(value)
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Commit the pending writes in a single transaction.
+        """
+        if not self._pending or self._pid != os.getpid():
+            return
+
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO entries VALUES (?, ?, ?)",
+                [(namespace, key, value) for (namespace, key), value in self._pending.items()]
+            )
+        self._pending = {}
+
+    def __len__(self):
+        self.flush()
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+
+_store: PersistentStore | None = None
+
+
+def get_store() -> PersistentStore | None:
+    """
+    The persistent store of the process, if one was configured.
+    """
+    return _store
+
+
+def configure(path: str | None, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Use the SQLite file at `path` as the persistent cache of this process,
+    `None` disables it. Worker processes must call this too, e.g. as the
+    initializer of their executor.
+    """
+    global _store
+
+    if _store is not None:
+        _store.close()
+
+    _store = None if path is None else PersistentStore(path, batch_size)
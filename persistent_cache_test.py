@@ -0,0 +1,54 @@
+import sqlite3
+import persistent_cache
+
+from codes_test import K5_2
+from kauffman import _kauffman_polynomial, kauffman_polynomial
+from laurent import LaurentPolynomial
+from persistent_cache import PersistentStore, decode_polynomial, encode_polynomial
+from skein_cache import clear_caches
+
+
+def test_polynomial_encoding():
+    p = LaurentPolynomial({(-3, 1): 2, (0, 0): -1, (4, -2): 10 ** 30})
+    assert decode_polynomial(encode_polynomial(p)) == p
+
+
+def test_store_batches_and_versions(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    store = PersistentStore(path, batch_size=2)
+
+    p = LaurentPolynomial({(1, 1): 1})
+    store.put("test", K5_2, p)
+
+    # pending writes are visible to this process only
+    assert store.get("test", K5_2) == p
+    assert PersistentStore(path).get("test", K5_2) is None
+
+    store.flush()
+    assert PersistentStore(path).get("test", K5_2) == p
+    assert store.get("other", K5_2) is None
+
+    # an older schema is discarded on open
+    store.close()
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE meta SET value = '0' WHERE key = 'schema_version'")
+    assert len(PersistentStore(path)) == 0
+
+
+def test_persistent_cache_reuse(tmp_path):
+    expected = kauffman_polynomial(K5_2, backend='sympy')
+
+    try:
+        persistent_cache.configure(str(tmp_path / "cache.sqlite"))
+        clear_caches()
+        assert kauffman_polynomial(K5_2, backend='laurent') == expected
+        persistent_cache.get_store().flush()
+        assert len(persistent_cache.get_store()) > 0
+
+        # a fresh process state only needs the top level entry
+        clear_caches()
+        assert kauffman_polynomial(K5_2, backend='laurent') == expected
+        stats = _kauffman_polynomial.cache_stats()
+        assert stats.hits == 1 and stats.misses == 0
+    finally:
+        persistent_cache.configure(None)
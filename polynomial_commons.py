@@ -1,18 +1,452 @@
+import base_table
 import functools
+import persistent_cache
+import shared_cache
 import utils
 import sympy
 
+from contextvars import ContextVar
+from dataclasses import dataclass
 from equation_dsl import Expression
-from codes import SGCode
-from typing import Callable, Literal
-from sympy import solve, symbols, Poly, Eq
+from codes import SGCode, canonical_values
+from packed_codes import PackedSGCode
+from laurent import LaurentPolynomial
+from skein_cache import DEFAULT_MAX_BYTES, CacheStats, CallStats, SkeinCache, call_count, count_call
+from typing import Any, Callable, ClassVar, Literal
+from sympy import solve, symbols, Poly, Eq, Expr, Symbol
 from utils import depth_print
 
 
-OptimizationType = Literal['expand', 'relabel', 'to_minimal']
+OptimizationType = Literal['expand', 'packed', 'relabel', 'to_minimal', 'canonical', 'symmetry']
 
+BackendName = Literal['sympy', 'laurent', 'dense', 'deferred', 'point', 'vector']
 
-def polynomial_wrapper(optimizations: set[OptimizationType] = {'expand'}):
+# A substitution of the two variables, x -> sx x^ex and y -> sy y^ey, is given
+# as ((sx, ex), (sy, ey)) with signs +1 or -1 and exponents +1 or -1
+Substitution = tuple[tuple[int, int], tuple[int, int]]
+
+IDENTITY: Substitution = ((1, 1), (1, 1))
+
+
+def compose_substitutions(s: Substitution, t: Substitution) -> Substitution:
+    """
+    The substitution that applies `s` and then `t`.
+    """
+    return tuple(
+        (s_sign * t_sign ** (s_exp % 2), s_exp * t_exp)
+        for (s_sign, s_exp), (t_sign, t_exp) in zip(s, t)
+    )
+
+
+@dataclass(frozen=True)
+class Backend:
+    """
+    The polynomial arithmetic used by the skein recursions.
+
+    A backend provides the two variables of the polynomial, integer constants
+    and the conversion to SymPy at the public boundary. The ring operations are
+    the Python operators of the elements (`+`, `-`, `*`, `**` and division by a
+    monomial), so the recursions are written once with plain operators.
+
+    Backends are hashable, so they can be part of the cache keys of the
+    recursions, and the elements of different backends never get mixed.
+    """
+    name: BackendName
+
+    # whether the elements are exact Laurent polynomials, these backends support
+    # `substitute` (needed by the 'symmetry' optimization) and the conversions
+    # to and from `LaurentPolynomial` (needed by the persistent cache)
+    exact: ClassVar[bool] = False
+
+    def variables(self, names: tuple[str, str]) -> tuple[Any, Any]:
+        """
+        Return the two generators, `names` are only used by symbolic backends.
+        """
+        raise NotImplementedError
+
+    def constant(self, c: int) -> Any:
+        raise NotImplementedError
+
+    def normalize(self, x):
+        """
+        Bring a result to canonical form, applied by the 'expand' optimization
+        after each recursive call.
+        """
+        return x
+
+    def substitute(self, x, substitution: Substitution):
+        """
+        Apply a substitution of the two variables, see `Substitution`.
+        """
+        raise ValueError(f"The {self.name} backend does not support substitution")
+
+    def to_laurent(self, x) -> LaurentPolynomial:
+        raise ValueError(f"The {self.name} backend is not exact")
+
+    def from_laurent(self, p: LaurentPolynomial):
+        raise ValueError(f"The {self.name} backend is not exact")
+
+    def truncate(self, x, max_y: int):
+        """
+        Drop all the terms with degree greater than `max_y` in the second
+        variable, used by the truncated computations.
+        """
+        raise ValueError(f"The {self.name} backend does not support truncation")
+
+    def to_sympy(self, x, variables: tuple[Symbol, Symbol]) -> Expr:
+        """
+        Convert an element to an expanded SymPy expression in the given variables.
+        """
+        raise NotImplementedError
+
+    def from_sympy(self, expr: Expr, variables: tuple[Symbol, Symbol]):
+        """
+        Convert a SymPy Laurent polynomial in the given variables to an element.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return self.name
+
+
+@dataclass(frozen=True, repr=False)
+class SympyBackend(Backend):
+    """
+    Plain SymPy expressions, this is how the recursions were originally written
+    and it is mostly useful as a reference.
+    """
+    name: BackendName = 'sympy'
+
+    def variables(self, names):
+        x, y = symbols(names)
+        return x, y
+
+    def constant(self, c):
+        return sympy.Integer(c)
+
+    def normalize(self, x):
+        return sympy.expand(x)
+
+    def to_sympy(self, x, variables):
+        return sympy.expand(x)
+
+    def from_sympy(self, expr, variables):
+        return sympy.expand(expr)
+
+
+@dataclass(frozen=True, repr=False)
+class LaurentBackend(Backend):
+    """
+    Sparse dicts of exponent pairs, see `laurent.LaurentPolynomial`.
+    """
+    name: BackendName = 'laurent'
+    exact: ClassVar[bool] = True
+
+    def variables(self, names):
+        return LaurentPolynomial.monomial(1, 0), LaurentPolynomial.monomial(0, 1)
+
+    def constant(self, c):
+        return LaurentPolynomial.constant(c)
+
+    def substitute(self, x, substitution):
+        return LaurentPolynomial.coerce(x).substitute(*substitution)
+
+    def to_laurent(self, x):
+        return LaurentPolynomial.coerce(x)
+
+    def from_laurent(self, p):
+        return p
+
+    def truncate(self, x, max_y):
+        return LaurentPolynomial.coerce(x).truncate(max_y)
+
+    def to_sympy(self, x, variables):
+        return LaurentPolynomial.coerce(x).to_sympy(*variables)
+
+    def from_sympy(self, expr, variables):
+        return LaurentPolynomial.from_sympy(expr, *variables)
+
+
+@dataclass(frozen=True, repr=False)
+class DenseBackend(Backend):
+    """
+    Dense 2-D NumPy coefficient matrices, see `dense_polynomial.DensePolynomial`.
+    numpy is only needed for this backend, so it is imported lazily.
+    """
+    name: BackendName = 'dense'
+    exact: ClassVar[bool] = True
+
+    def variables(self, names):
+        from dense_polynomial import DensePolynomial
+        return DensePolynomial.monomial(1, 0), DensePolynomial.monomial(0, 1)
+
+    def constant(self, c):
+        from dense_polynomial import DensePolynomial
+        return DensePolynomial.constant(c)
+
+    def substitute(self, x, substitution):
+        return self.from_laurent(self.to_laurent(x).substitute(*substitution))
+
+    def to_laurent(self, x):
+        return LaurentPolynomial((self.constant(0) + x).to_terms())
+
+    def from_laurent(self, p):
+        from dense_polynomial import DensePolynomial
+        return DensePolynomial.from_terms(p.terms)
+
+    def truncate(self, x, max_y):
+        return (self.constant(0) + x).truncate(max_y)
+
+    def to_sympy(self, x, variables):
+        return (self.constant(0) + x).to_sympy(*variables)
+
+    def from_sympy(self, expr, variables):
+        from dense_polynomial import DensePolynomial
+        return DensePolynomial.from_terms(
+            LaurentPolynomial.from_sympy(expr, *variables).terms
+        )
+
+
+@dataclass(frozen=True, repr=False)
+class DeferredBackend(Backend):
+    """
+    Expression DAGs over Laurent polynomials, see `deferred.DeferredPolynomial`.
+    Nothing is normalized during the recursion, the results are kept as nodes
+    and the substitutions of the 'symmetry' memo are nodes too. The DAG is
+    flattened only at the public boundary and shared subresults are expanded
+    once.
+    """
+    name: BackendName = 'deferred'
+    exact: ClassVar[bool] = True
+
+    def variables(self, names):
+        from deferred import DeferredPolynomial
+        return (
+            DeferredPolynomial.leaf(LaurentPolynomial.monomial(1, 0)),
+            DeferredPolynomial.leaf(LaurentPolynomial.monomial(0, 1)),
+        )
+
+    def constant(self, c):
+        from deferred import DeferredPolynomial
+        return DeferredPolynomial.leaf(c)
+
+    def normalize(self, x):
+        # results are kept as nodes, so the expressions built from them are not
+        # folded, see `DeferredPolynomial.as_node`
+        from deferred import DeferredPolynomial
+        return DeferredPolynomial.coerce(x).as_node()
+
+    def substitute(self, x, substitution):
+        from deferred import DeferredPolynomial
+        return DeferredPolynomial.coerce(x).substitute(substitution)
+
+    def to_laurent(self, x):
+        from deferred import DeferredPolynomial
+        return DeferredPolynomial.coerce(x).value()
+
+    def from_laurent(self, p):
+        from deferred import DeferredPolynomial
+        return DeferredPolynomial.result(p)
+
+    def truncate(self, x, max_y):
+        from deferred import DeferredPolynomial
+        return DeferredPolynomial.result(
+            DeferredPolynomial.coerce(x).value().truncate(max_y)
+        )
+
+    def to_sympy(self, x, variables):
+        from deferred import DeferredPolynomial
+        return DeferredPolynomial.coerce(x).value().to_sympy(*variables)
+
+    def from_sympy(self, expr, variables):
+        from deferred import DeferredPolynomial
+        return DeferredPolynomial.leaf(LaurentPolynomial.from_sympy(expr, *variables))
+
+
+@dataclass(frozen=True, repr=False)
+class PointBackend(Backend):
+    """
+    Evaluation at a fixed point: the two variables are replaced by the numbers in
+    `point` (e.g. `modular.ModInt`, `Fraction` or `complex`) and every node of
+    the recursion is a few scalar operations. A value has no symbolic form, so
+    the conversion at the boundary returns it as it is.
+    """
+    point: tuple[Any, Any] = (1, 1)
+    name: BackendName = 'point'
+
+    def variables(self, names):
+        return self.point
+
+    def constant(self, c):
+        return self.point[0] * 0 + c
+
+    def to_sympy(self, x, variables):
+        return x
+
+    def __repr__(self):
+        return f"point{self.point!r}"
+
+
+@dataclass(frozen=True, repr=False)
+class VectorBackend(Backend):
+    """
+    Evaluation at many points at once, `xs[k], ys[k]` being the k-th point.
+    Every element is a vector with one value per point, so a single traversal of
+    the skein tree evaluates the invariant everywhere.
+
+    With a prime `modulus` the values are `mod_vector.ModVector` residues,
+    otherwise they are float or complex NumPy arrays. numpy is imported lazily
+    as for `DenseBackend`.
+    """
+    xs: tuple[Any, ...] = ()
+    ys: tuple[Any, ...] = ()
+    modulus: int | None = None
+    name: BackendName = 'vector'
+
+    def __post_init__(self):
+        assert len(self.xs) == len(self.ys), "Mismatched number of coordinates"
+
+        # the backend is part of the key of every cached call and the grids
+        # have hundreds of points, so the hash is computed once. The name is
+        # left out as str hashes differ between the worker processes.
+        object.__setattr__(self, '_hash', hash((self.xs, self.ys, self.modulus)))
+
+    def __hash__(self):
+        return self._hash
+
+    def _vector(self, values):
+        import numpy as np
+
+        if self.modulus is not None:
+            from mod_vector import ModVector
+            return ModVector(np.asarray(values, dtype=np.int64), self.modulus)
+
+        dtype = np.result_type(np.asarray(self.xs), np.asarray(self.ys), np.float64)
+        return np.asarray(values, dtype=dtype)
+
+    def variables(self, names):
+        return self._vector(self.xs), self._vector(self.ys)
+
+    def constant(self, c):
+        return self._vector([c] * len(self.xs))
+
+    def to_sympy(self, x, variables):
+        return x
+
+    def __repr__(self):
+        modulus = "" if self.modulus is None else f" mod {self.modulus}"
+        return f"vector[{len(self.xs)}{modulus}]"
+
+
+BACKENDS: dict[str, Backend] = {
+    'sympy': SympyBackend(),
+    'laurent': LaurentBackend(),
+    'dense': DenseBackend(),
+    'deferred': DeferredBackend(),
+}
+
+
+default_backend: ContextVar[Backend] = ContextVar(
+    'default_backend', default=BACKENDS['laurent']
+)
+
+
+def get_backend(
+    backend: Backend | BackendName | None = None,
+    point: tuple[Any, Any] | None = None,
+) -> Backend:
+    """
+    Resolve a backend given by instance or by name, `None` selects the current
+    default backend (see `set_default_backend`). Giving a `point` instead selects
+    the evaluation at that point (see `PointBackend`).
+    """
+    if point is not None:
+        if backend is not None:
+            raise ValueError("Cannot give both a backend and a point")
+        return PointBackend(point=tuple(point))
+    if backend is None:
+        return default_backend.get()
+    if isinstance(backend, Backend):
+        return backend
+    if backend in BACKENDS:
+        return BACKENDS[backend]
+
+    raise ValueError(
+        f"Unknown polynomial backend: {backend!r}, "
+        f"available backends: {', '.join(BACKENDS)}"
+    )
+
+
+def set_default_backend(backend: Backend | BackendName):
+    """
+    Set the backend used by all the polynomial functions when they are called
+    without an explicit backend.
+    """
+    default_backend.set(get_backend(backend))
+
+
+SymmetryType = Literal['mirror', 'reverse']
+
+
+def external_stores() -> list:
+    """
+    The stores outside of the caches of the process that are configured,
+    fastest first: the table of the small diagrams (see `base_table`), the
+    shared memory cache of the workers of a sweep (see `shared_cache`) and the
+    persistent cache (see `persistent_cache`).
+    """
+    return [
+        store
+        for store in (
+            base_table.get_table(),
+            shared_cache.get_shared(),
+            persistent_cache.get_store(),
+        )
+        if store is not None
+    ]
+
+
+def _canonical_key(
+    link: SGCode | PackedSGCode, symmetries: dict[SymmetryType, Substitution] | None
+) -> tuple[PackedSGCode, Substitution]:
+    """
+    Return the canonical form of the link, or with `symmetries` the least one
+    among the canonical forms of the link, its mirror, its reverse and its
+    reversed mirror, together with the substitution that turns the polynomial
+    of the link into the polynomial of the returned diagram.
+
+    Everything runs on the crossing values (see `codes.canonical_values`), the
+    variants are never built as diagrams and the key is a `PackedSGCode`, equal
+    to the `SGCode` of the canonical form.
+    """
+    values = link.values()
+    if symmetries is None:
+        return PackedSGCode.from_components(canonical_values(values)), IDENTITY
+
+    mirror, reverse = symmetries['mirror'], symmetries['reverse']
+    # the switch of a crossing value is `value ^ 3`, see `codes.crossing_value`
+    variants = [
+        (values, IDENTITY),
+        ([[value ^ 3 for value in component[::-1]] for component in values], mirror),
+        ([component[::-1] for component in values], reverse),
+        ([[value ^ 3 for value in component] for component in values], compose_substitutions(mirror, reverse)),
+    ]
+
+    encoding, substitution = min(
+        (
+            (canonical_values(variant), substitution)
+            for variant, substitution in variants
+        ),
+        key=lambda entry: entry[0]
+    )
+    return PackedSGCode.from_components(encoding), substitution
+
+
+def polynomial_wrapper(
+    optimizations: set[OptimizationType] = {'expand'},
+    backend: Backend | BackendName | None = None,
+    symmetries: dict[SymmetryType, Substitution] | None = None,
+):
     """
     A decorator factory for polynomial computation functions that applies common optimizations.
 
@@ -22,40 +456,156 @@ def polynomial_wrapper(optimizations: set[OptimizationType] = {'expand'}):
     Args:
         optimizations (set[OptimizationType], optional): A set of optimization types to apply.
             Defaults to {'expand'}. Available optimizations:
+            - 'packed': Run the function on the `packed_codes.PackedSGCode` of the link,
+              so that the whole recursion works on flat integer arrays
             - 'to_minimal': Convert the link to minimal rotated form before processing
             - 'relabel': Relabel the link for consistent indexing (useful for caching)
-            - 'expand': Expand the resulting polynomial for consistency
+            - 'canonical': Reuse the results of links with the same canonical form (see
+              `SGCode.canonical`). The canonical form is only the key of an extra memo,
+              the function still runs on the link as given, as the skein recursions
+              depend on its base points to terminate
+            - 'symmetry': Like 'canonical' but with one memo entry for the link, its
+              mirror, its reverse and its reversed mirror, the results are moved between
+              them with the substitutions in `symmetries`. Only used on backends that
+              support `Backend.substitute`. The four canonical forms per call cost more
+              than the entries they save on the recursions of this package, so it is
+              opt-in, see `optimizations` below
+            - 'expand': Normalize the resulting polynomial for consistency
+        backend (Backend | BackendName | None, optional): The backend used when the
+            wrapper is called without one. Defaults to None, that is the process
+            default backend at call time (see `set_default_backend`).
+        symmetries (dict[SymmetryType, Substitution] | None, optional): How the
+            polynomial changes under `SGCode.mirror` and `SGCode.reverse`, needed
+            by the 'symmetry' optimization.
 
     Returns:
         Callable: A decorator that can be applied to functions with signature
-        (SGCode) -> Poly to add the specified optimizations.
+        (SGCode, Backend) -> polynomial, the wrapped function has signature
+        (SGCode, backend=None) -> polynomial and the backend can be given by
+        instance or by name. Extra keyword arguments are passed through.
 
     Note:
-        The decorator also updates a progress bar on each function call.
-        Optimizations are applied in a specific order: to_minimal, then relabel
-        (before function execution), then expand (after function execution).
+        The decorator also updates a progress bar on each function call, and
+        counts the call with `skein_cache.count_call`, the caches use these
+        counts as the cost of their entries.
+        Optimizations are applied in a specific order: packed, to_minimal, then relabel,
+        then the canonical lookup (before function execution), then expand (after
+        function execution). The canonical memo is a `skein_cache.SkeinCache`
+        exposed as `canonical_cache` on the wrapped function, while it is in use
+        the memo of the function itself (if any) is disabled. On exact backends
+        it is backed by the shared and persistent caches when they are
+        configured (see `external_stores`). The wrapped function also gets
+        `cache_stats()`, the `skein_cache.CacheStats` of its calls, and
+        `optimizations`, the set of the optimizations in use, that can be changed
+        between calls (e.g. to add 'symmetry').
     """
-    def decorator(func: Callable[[SGCode], Poly]) -> Callable[[SGCode], Poly]:
+    default = backend
+
+    def decorator(func: Callable[[SGCode, Backend], Any]) -> Callable[..., Any]:
+        active = set(optimizations)
+        canonical_cache = SkeinCache(max_bytes=DEFAULT_MAX_BYTES)
+        call_stats = CallStats()
+        # the memo of the function itself, if it has one
+        inner_cache: SkeinCache | None = getattr(func, 'cache', None)
+
+        def namespace(kwargs: dict[str, Any]) -> str:
+            return f"{func.__module__}.{func.__qualname__}" + "".join(
+                f";{name}={value!r}" for name, value in sorted(kwargs.items())
+            )
+
         @functools.wraps(func)
-        def wrapper(link: SGCode) -> Poly:
+        def wrapper(link: SGCode, backend: Backend | BackendName | None = None, **kwargs):
             pb = utils.progress_bar.get()
             pb.update(1)
+            count_call()
+
+            backend = get_backend(backend or default)
+
+            if 'packed' in active and not isinstance(link, PackedSGCode):
+                link = PackedSGCode.from_sgcode(link)
 
             # First we convert to minimal rotated form and only then we relabel,
             # this ensures a consistent indexing for the cache.
-            if 'to_minimal' in optimizations:
+            if 'to_minimal' in active and 'relabel' in active:
+                link = link.normalized()
+            elif 'to_minimal' in active:
                 link = link.to_minimal()
-            if 'relabel' in optimizations:
+            elif 'relabel' in active:
                 link = link.relabel()
 
-            result = func(link)
+            crossings, depth = link.crossings_count(), utils.get_depth()
+            use_symmetry = 'symmetry' in active and backend.exact
+            use_canonical = 'canonical' in active or use_symmetry
+
+            # the canonical memo holds every result, keeping them in the memo
+            # of the function too would only double the memory
+            if inner_cache is not None:
+                inner_cache.enabled = not use_canonical
+
+            if use_canonical:
+                canonical_link, substitution = _canonical_key(
+                    link, symmetries if use_symmetry else None
+                )
+                key = (canonical_link, backend, tuple(sorted(kwargs.items())))
+                cached = canonical_cache.get(key)
+
+                stores = external_stores() if backend.exact else []
+                for k, store in enumerate(stores if cached is None else []):
+                    stored = store.get(namespace(kwargs), canonical_link)
+                    if stored is not None:
+                        # publish to the faster stores that missed
+                        for faster_store in stores[:k]:
+                            if not faster_store.read_only:
+                                faster_store.put(namespace(kwargs), canonical_link, stored)
 
-            # Finally, for consistency, we expand the result
-            if 'expand' in optimizations:
-                result = sympy.expand(result)
+                        cached = backend.from_laurent(stored)
+                        canonical_cache.put(key, cached)
+                        break
+
+                if cached is not None:
+                    call_stats.record(crossings, depth, hit=True)
+
+                    # all the substitutions are involutions
+                    if substitution == IDENTITY:
+                        return cached
+                    return backend.substitute(cached, substitution)
+
+            call_stats.record(crossings, depth, hit=(
+                inner_cache is not None and inner_cache.enabled
+                and SkeinCache.key(link, backend, **kwargs) in inner_cache
+            ))
+
+            start = call_count()
+            result = func(link, backend, **kwargs)
+
+            # Finally, for consistency, we normalize the result
+            if 'expand' in active:
+                result = backend.normalize(result)
+
+            if use_canonical:
+                canonical_result = (
+                    result if substitution == IDENTITY
+                    else backend.substitute(result, substitution)
+                )
+                canonical_cache.put(key, canonical_result, cost=call_count() - start)
+
+                # flattening the result is only worth it if it is written
+                writable = [store for store in stores if not store.read_only]
+                if writable:
+                    value = backend.to_laurent(canonical_result)
+                    for store in writable:
+                        store.put(namespace(kwargs), canonical_link, value)
 
             return result
 
+        def cache_stats() -> CacheStats:
+            return call_stats.stats(
+                [canonical_cache] + ([inner_cache] if inner_cache is not None else [])
+            )
+
+        wrapper.canonical_cache = canonical_cache
+        wrapper.optimizations = active
+        wrapper.cache_stats = cache_stats
         return wrapper
 
     return decorator
@@ -0,0 +1,137 @@
+import importlib.util
+import pytest
+
+from codes_test import K5_2
+from kauffman import kauffman_polynomial
+from homfly import homfly_polynomial
+from polynomial_commons import BACKENDS, get_backend, set_default_backend, default_backend
+
+
+def test_get_backend():
+    assert get_backend('sympy') is BACKENDS['sympy']
+    assert get_backend(BACKENDS['dense']) is BACKENDS['dense']
+    assert get_backend(None) is default_backend.get()
+
+    with pytest.raises(ValueError):
+        get_backend('unknown')
+
+
+def test_backends_agree():
+    expected_L = kauffman_polynomial(K5_2, backend='sympy')
+    expected_P = homfly_polynomial(K5_2, backend='sympy')
+
+    names = ['laurent', 'deferred']
+    if importlib.util.find_spec("numpy") is not None:
+        names.append('dense')
+
+    for name in names:
+        assert kauffman_polynomial(K5_2, backend=name) == expected_L
+        assert homfly_polynomial(K5_2, backend=name) == expected_P
+
+
+def test_set_default_backend():
+    previous = get_backend()
+    set_default_backend('sympy')
+
+    try:
+        assert get_backend() is BACKENDS['sympy']
+        assert kauffman_polynomial(K5_2) == kauffman_polynomial(K5_2, 'laurent')
+    finally:
+        set_default_backend(previous)
+
+
+def test_point_evaluation():
+    from fractions import Fraction
+    from modular import ModInt
+    from kauffman import a, z, f_polynomial
+    from homfly import v, z as z_
+
+    L = kauffman_polynomial(K5_2)
+    F = f_polynomial(K5_2)
+    P = homfly_polynomial(K5_2)
+
+    point = (Fraction(2), Fraction(-1, 3))
+    assert kauffman_polynomial(K5_2, point=point) == L.subs({a: point[0], z: point[1]})
+    assert f_polynomial(K5_2, point=point) == F.subs({a: point[0], z: point[1]})
+    assert homfly_polynomial(K5_2, point=point) == P.subs({v: point[0], z_: point[1]})
+
+    p = 2147483647
+    value = homfly_polynomial(K5_2, point=(ModInt(5, p), ModInt(7, p)))
+    expected = P.subs({v: 5, z_: 7})
+    assert value == ModInt(expected.p, p) / expected.q
+
+    value = kauffman_polynomial(K5_2, point=(1.5 + 0.5j, 0.25j))
+    assert abs(value - complex(L.subs({a: 1.5 + 0.5j, z: 0.25j}))) < 1e-9
+
+    with pytest.raises(ValueError):
+        kauffman_polynomial(K5_2, backend='laurent', point=point)
+
+    # the backends of the evaluations are not all kept alive
+    import kauffman
+    for k in range(1, 21):
+        kauffman_polynomial(K5_2, point=(Fraction(k), Fraction(1)))
+    assert kauffman._variables.cache_info().currsize < 20
+
+
+def test_vector_backend():
+    np = pytest.importorskip("numpy")
+    from modular import ModInt
+    from polynomial_commons import VectorBackend
+
+    p = 2147483647
+    points = [(2, 3), (5, 7), (11, 4)]
+
+    backend = VectorBackend(
+        xs=tuple(x for x, _ in points), ys=tuple(y for _, y in points), modulus=p
+    )
+    same = VectorBackend(xs=backend.xs, ys=backend.ys, modulus=p)
+    assert same == backend and hash(same) == hash(backend)
+
+    values = homfly_polynomial(K5_2, backend)
+    assert values.values.tolist() == [
+        int(homfly_polynomial(K5_2, point=(ModInt(x, p), ModInt(y, p))))
+        for x, y in points
+    ]
+
+    points = [(0.5 + 1j, 2j), (1.5, -0.25)]
+    backend = VectorBackend(
+        xs=tuple(x for x, _ in points), ys=tuple(y for _, y in points)
+    )
+    values = kauffman_polynomial(K5_2, backend)
+    assert np.allclose(values, [
+        complex(kauffman_polynomial(K5_2, point=point)) for point in points
+    ])
+
+
+def test_symmetry_substitutions():
+    from laurent import LaurentPolynomial
+    from polynomial_commons import IDENTITY, compose_substitutions
+
+    p = LaurentPolynomial({(1, 2): 3, (-1, 1): 5, (2, -3): 7})
+    mirror = ((1, -1), (-1, 1))
+
+    assert p.substitute(*IDENTITY) == p
+    assert p.substitute(*mirror).substitute(*mirror) == p
+    assert compose_substitutions(mirror, mirror) == IDENTITY
+    assert p.substitute(*mirror) == LaurentPolynomial(
+        {(-1, 2): 3, (1, 1): -5, (-2, -3): -7}
+    )
+
+
+def test_symmetry_memo():
+    from homfly import _homfly_polynomial
+
+    expected = homfly_polynomial(K5_2.mirror(), backend='sympy')
+
+    assert 'symmetry' not in _homfly_polynomial.optimizations
+    _homfly_polynomial.optimizations.add('symmetry')
+    try:
+        _homfly_polynomial.canonical_cache.clear()
+        homfly_polynomial(K5_2, backend='laurent')
+
+        # the mirror is served from the memo entry of K5_2
+        size = len(_homfly_polynomial.canonical_cache)
+        assert homfly_polynomial(K5_2.mirror(), backend='laurent') == expected
+        assert len(_homfly_polynomial.canonical_cache) == size
+    finally:
+        _homfly_polynomial.optimizations.discard('symmetry')
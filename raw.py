@@ -9,6 +9,9 @@ import argparse
 import utils
 import kauffman
 import homfly
+import polynomial_commons
+import persistent_cache
+import skein_cache
 import database_knotinfo
 
 from typing import Callable
@@ -128,6 +131,31 @@ def main():
         help="Polynomial to compute (P=HOMFLY, F=Kauffman F, L=Kauffman L)"
     )
 
+    parser.add_argument(
+        '--backend',
+        choices=list(polynomial_commons.BACKENDS.keys()),
+        default="laurent",
+        help="Polynomial arithmetic backend used by the recursion (default: laurent)"
+    )
+
+    parser.add_argument(
+        '--cache-db',
+        nargs='?',
+        const=persistent_cache.DEFAULT_PATH,
+        default=None,
+        metavar='PATH',
+        help=f"Reuse sub-diagram results stored in an SQLite file across runs (default path: {persistent_cache.DEFAULT_PATH})"
+    )
+
+    parser.add_argument(
+        '--spill-dir',
+        nargs='?',
+        const=skein_cache.DEFAULT_SPILL_DIR,
+        default=None,
+        metavar='DIR',
+        help=f"Move sub-diagram results evicted from the memory caches to a log in DIR instead of dropping them (default directory: {skein_cache.DEFAULT_SPILL_DIR})"
+    )
+
     parser.add_argument(
         '--pd',
         action=SpecsAction,
@@ -162,6 +190,9 @@ def main():
 
     # Disable debug output for clean machine processing
     utils.global_debug = False
+    polynomial_commons.set_default_backend(args.backend)
+    persistent_cache.configure(args.cache_db)
+    skein_cache.spill_caches(args.spill_dir)
 
     # Get polynomial function
     poly_fn = AVAILABLE_POLYNOMIALS[args.polynomial]
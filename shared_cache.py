@@ -0,0 +1,196 @@
+"""
+A cache of skein subproblems shared by the worker processes of a sweep, backed
+by `multiprocessing.shared_memory`.
+
+The segment holds a header, an open-addressing table of slots and a heap of
+entries. Each slot has the 64-bit hash of its key and the offset and length of
+its entry in the heap, an entry is the full key followed by the packed terms of
+the polynomial. Keys are the namespace of the recursion and the encoding of the
+canonical diagram, as for the persistent cache.
+
+Readers take no lock: a writer appends the entry, fills the slot and only then
+publishes its hash, and readers compare the full key before using an entry.
+Writers serialize on a `multiprocessing.Lock`. When the heap is full, or a key
+finds no free slot within `MAX_PROBES` slots, new entries are simply not shared,
+so a lookup never scans more than a few slots however full the table gets.
+"""
+
+import hashlib
+import struct
+
+from array import array
+from multiprocessing import shared_memory
+from codes import SGCode
+from laurent import LaurentPolynomial
+from persistent_cache import encode_link
+
+
+MAGIC = 0x534b4e31  # "SKN1"
+
+# magic, number of slots, heap size, heap top
+HEADER = struct.Struct('<IIQQ')
+# hash, offset, length
+SLOT = struct.Struct('<QQI')
+
+# average bytes per entry, used to size the table from the segment size
+ENTRY_BYTES = 256
+
+DEFAULT_SIZE = 256 * 1024 * 1024
+
+# longest run of slots looked at for a key, past it the key counts as a miss
+MAX_PROBES = 16
+
+
+def _key(namespace: str, link: SGCode) -> bytes:
+    return namespace.encode() + b'\0' + encode_link(link)
+
+
+def _hash(key: bytes) -> int:
+    # Python's hash is salted per process, this must agree between workers,
+    # and 0 marks an empty slot
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little') or 1
+
+
+def _pack_terms(p: LaurentPolynomial) -> bytes | None:
+    values = array('q')
+    try:
+        for (i, j), c in p.terms.items():
+            values.extend((i, j, c))
+    except OverflowError:
+        return None
+
+    return values.tobytes()
+
+
+def _unpack_terms(data: bytes) -> LaurentPolynomial:
+    values = array('q')
+    values.frombytes(data)
+    return LaurentPolynomial({
+        (values[k], values[k + 1]): values[k + 2]
+        for k in range(0, len(values), 3)
+    })
+
+
+class SharedCache:
+    """
+    A fixed size hash table in a shared memory segment, see the module docs.
+    The process that creates the segment must `unlink()` it at the end.
+    """
+
+    read_only = False
+
+    def __init__(self, name: str | None = None, size: int = DEFAULT_SIZE, lock=None, create: bool = False):
+        if create:
+            self.memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+            n_slots = max(size // ENTRY_BYTES, 1)
+            heap_size = size - HEADER.size - n_slots * SLOT.size
+            assert heap_size > 0, "Shared cache too small"
+
+            self.memory.buf[:HEADER.size + n_slots * SLOT.size] = bytes(
+                HEADER.size + n_slots * SLOT.size
+            )
+            HEADER.pack_into(self.memory.buf, 0, MAGIC, n_slots, heap_size, 0)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name, track=False)
+
+        magic, self.n_slots, self.heap_size, _ = HEADER.unpack_from(self.memory.buf, 0)
+        assert magic == MAGIC, "Not a shared skein cache"
+
+        self.heap_start = HEADER.size + self.n_slots * SLOT.size
+        self.lock = lock
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def _slots(self, h: int):
+        start = h % self.n_slots
+        for k in range(min(self.n_slots, MAX_PROBES)):
+            yield HEADER.size + ((start + k) % self.n_slots) * SLOT.size
+
+    def get(self, namespace: str, link: SGCode) -> LaurentPolynomial | None:
+        key = _key(namespace, link)
+        h = _hash(key)
+        buf = self.memory.buf
+
+        for slot in self._slots(h):
+            slot_hash, offset, length = SLOT.unpack_from(buf, slot)
+            if slot_hash == 0:
+                return None
+            if slot_hash != h:
+                continue
+
+            entry = bytes(buf[self.heap_start + offset:self.heap_start + offset + length])
+            key_length, = struct.unpack_from('<I', entry, 0)
+            if entry[4:4 + key_length] == key:
+                return _unpack_terms(entry[4 + key_length:])
+
+        return None
+
+    def put(self, namespace: str, link: SGCode, value: LaurentPolynomial):
+        terms = _pack_terms(value)
+        if terms is None:
+            return
+
+        key = _key(namespace, link)
+        h = _hash(key)
+        entry = struct.pack('<I', len(key)) + key + terms
+
+        assert self.lock is not None, "Writing needs the lock of the cache"
+        with self.lock:
+            buf = self.memory.buf
+            magic, n_slots, heap_size, heap_top = HEADER.unpack_from(buf, 0)
+            if heap_top + len(entry) > heap_size:
+                return
+
+            for slot in self._slots(h):
+                slot_hash, _, _ = SLOT.unpack_from(buf, slot)
+                if slot_hash == h:
+                    # already published, or a 64-bit collision: keep the first
+                    return
+                if slot_hash == 0:
+                    start = self.heap_start + heap_top
+                    buf[start:start + len(entry)] = entry
+                    HEADER.pack_into(buf, 0, magic, n_slots, heap_size, heap_top + len(entry))
+
+                    # publish the hash last, readers skip the slot until then
+                    struct.pack_into('<QI', buf, slot + 8, heap_top, len(entry))
+                    struct.pack_into('<Q', buf, slot, h)
+                    return
+
+    def __len__(self):
+        return sum(
+            1 for k in range(self.n_slots)
+            if SLOT.unpack_from(self.memory.buf, HEADER.size + k * SLOT.size)[0] != 0
+        )
+
+    def close(self):
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+_shared: SharedCache | None = None
+
+
+def get_shared() -> SharedCache | None:
+    """
+    The shared cache attached to this process, if any.
+    """
+    return _shared
+
+
+def attach(name: str | None, lock=None):
+    """
+    Attach this process to the shared cache with the given segment name, `None`
+    detaches it. Worker processes call this in the initializer of their
+    executor, with the lock created by the parent.
+    """
+    global _shared
+
+    if _shared is not None:
+        _shared.close()
+
+    _shared = None if name is None else SharedCache(name, lock=lock)
@@ -0,0 +1,78 @@
+import concurrent.futures
+import multiprocessing
+import shared_cache
+
+from codes import SGCode
+from codes_test import K5_2
+from laurent import LaurentPolynomial
+from shared_cache import SharedCache
+
+
+HOPF = SGCode.from_tuples([[(1, +1), (-2, +1)], [(-1, +1), (2, +1)]])
+
+
+def _publish(namespace):
+    shared_cache.get_shared().put(namespace, HOPF, LaurentPolynomial({(1, -1): 3}))
+
+
+def test_shared_cache_roundtrip():
+    lock = multiprocessing.Lock()
+    cache = SharedCache(size=64 * 1024, lock=lock, create=True)
+
+    try:
+        p = LaurentPolynomial({(1, 2): -3, (-4, 0): 7})
+        cache.put("test", K5_2, p)
+
+        assert cache.get("test", K5_2) == p
+        assert cache.get("other", K5_2) is None
+        assert cache.get("test", HOPF) is None
+
+        # entries published by another process are visible here, the lock can
+        # only be passed at process creation
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=1,
+            initializer=shared_cache.attach,
+            initargs=(cache.name, lock),
+        ) as executor:
+            executor.submit(_publish, "test").result()
+
+        assert cache.get("test", HOPF) == LaurentPolynomial({(1, -1): 3})
+        assert len(cache) == 2
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+def test_shared_cache_full():
+    cache = SharedCache(size=4096, lock=multiprocessing.Lock(), create=True)
+
+    try:
+        big = LaurentPolynomial({(i, 0): 1 for i in range(200)})
+        cache.put("test", K5_2, big)
+
+        # does not fit, so it is not shared
+        assert cache.get("test", K5_2) is None
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+def test_shared_cache_probe_limit():
+    cache = SharedCache(size=64 * 1024, lock=multiprocessing.Lock(), create=True)
+
+    try:
+        h = shared_cache._hash(shared_cache._key("test", K5_2))
+        start = h % cache.n_slots
+
+        # the run of slots of the key is taken by other entries, the first free
+        # slot is just past the probe limit
+        for k in range(shared_cache.MAX_PROBES):
+            slot = shared_cache.HEADER.size + (start + k) % cache.n_slots * shared_cache.SLOT.size
+            shared_cache.SLOT.pack_into(cache.memory.buf, slot, h ^ 1, 0, 0)
+
+        cache.put("test", K5_2, LaurentPolynomial({(1, 2): -3}))
+        assert cache.get("test", K5_2) is None
+        assert len(cache) == shared_cache.MAX_PROBES
+    finally:
+        cache.close()
+        cache.unlink()
@@ -0,0 +1,534 @@
+from __future__ import annotations
+
+import atexit
+import functools
+import heapq
+import itertools
+import math
+import os
+import pickle
+import sys
+import tempfile
+import weakref
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+
+# Default budget of each cache of the skein recursions
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Where the caches spill their evicted entries by default, see `spill_caches`
+DEFAULT_SPILL_DIR = os.path.join(tempfile.gettempdir(), 'kauffman-polynomial')
+
+# Rough memory footprints, measured with tracemalloc on typical entries
+CROSSING_BYTES = 110
+TERM_BYTES = 90
+OBJECT_BYTES = 64
+
+# Number of calls of the skein recursions made so far in this process, counted
+# by `polynomial_wrapper` together with its progress bar
+_calls = 0
+
+
+def count_call():
+    global _calls
+    _calls += 1
+
+
+def call_count() -> int:
+    return _calls
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    A cheap estimate of the memory held by a cache key or value, in bytes.
+    Diagrams and Laurent polynomials are estimated from their sizes, packed
+    diagrams and NumPy backed values from their buffers, anything else with
+    `sys.getsizeof`.
+    """
+    if isinstance(obj, (tuple, list)):
+        return OBJECT_BYTES + sum(estimate_size(item) for item in obj)
+
+    offsets = getattr(obj, 'offsets', None)
+    if hasattr(offsets, 'itemsize'):
+        # a packed diagram, see `packed_codes.PackedSGCode`
+        return OBJECT_BYTES + (len(obj.crossings) + len(offsets)) * offsets.itemsize
+
+    components = getattr(obj, 'components', None)
+    if components is not None:
+        return OBJECT_BYTES + sum(
+            OBJECT_BYTES + CROSSING_BYTES * len(component)
+            for component in components
+        )
+
+    terms = getattr(obj, 'terms', None)
+    if isinstance(terms, dict):
+        return OBJECT_BYTES + TERM_BYTES * len(terms)
+
+    for attribute in ('coeffs', 'values'):
+        array = getattr(obj, attribute, None)
+        if hasattr(array, 'nbytes'):
+            return OBJECT_BYTES + array.nbytes
+
+    if hasattr(obj, 'nbytes'):
+        return OBJECT_BYTES + obj.nbytes
+
+    return sys.getsizeof(obj)
+
+
+@dataclass
+class CacheInfo:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_entries: int | None
+    max_bytes: int | None
+    disk_hits: int = 0
+    disk_entries: int = 0
+    disk_bytes: int = 0
+
+
+@dataclass
+class LevelStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class CacheStats:
+    """
+    How well the caches of a skein recursion work: the calls of the recursion
+    that were answered by a cache or a store (hits) or computed (misses), in
+    total and by the crossings of their diagram and by recursion depth, and
+    the entries and estimated bytes held by the caches.
+
+    Stats add up, e.g. over the worker processes of a sweep, and subtracting
+    an earlier snapshot gives the stats of the calls made since.
+    """
+    hits: int = 0
+    misses: int = 0
+    entries: int = 0
+    bytes: int = 0
+    by_crossings: dict[int, LevelStats] = field(default_factory=dict)
+    by_depth: dict[int, LevelStats] = field(default_factory=dict)
+
+    @property
+    def hit_rate(self) -> float:
+        return LevelStats(self.hits, self.misses).hit_rate
+
+    def _combine(self, other: CacheStats, sign: int) -> CacheStats:
+        def combine_levels(x: dict[int, LevelStats], y: dict[int, LevelStats]):
+            levels = {}
+            for level in sorted(x.keys() | y.keys()):
+                a, b = x.get(level, LevelStats()), y.get(level, LevelStats())
+                combined = LevelStats(a.hits + sign * b.hits, a.misses + sign * b.misses)
+                if combined != LevelStats():
+                    levels[level] = combined
+            return levels
+
+        return CacheStats(
+            hits=self.hits + sign * other.hits,
+            misses=self.misses + sign * other.misses,
+            entries=self.entries + sign * other.entries,
+            bytes=self.bytes + sign * other.bytes,
+            by_crossings=combine_levels(self.by_crossings, other.by_crossings),
+            by_depth=combine_levels(self.by_depth, other.by_depth),
+        )
+
+    def __add__(self, other: CacheStats) -> CacheStats:
+        return self._combine(other, +1)
+
+    def __sub__(self, other: CacheStats) -> CacheStats:
+        return self._combine(other, -1)
+
+    def format(self) -> str:
+        lines = [
+            f"{self.hits} hits, {self.misses} misses, hit rate {self.hit_rate:.1%}, "
+            f"{self.entries} entries, {self.bytes / 1024 / 1024:.1f} MB"
+        ]
+        for title, levels in (("crossings", self.by_crossings), ("depth", self.by_depth)):
+            lines.append(f"{title:>10} {'hits':>10} {'misses':>10} {'hit rate':>9}")
+            for level, stats in levels.items():
+                lines.append(
+                    f"{level:>10} {stats.hits:>10} {stats.misses:>10} {stats.hit_rate:>9.1%}"
+                )
+
+        return "\n".join(lines)
+
+
+class CallStats:
+    """
+    Counts the hits and misses of the calls of a recursion by the crossings of
+    their diagram and by depth, it is reset together with the caches.
+    """
+
+    def __init__(self):
+        # (crossings, depth) -> [hits, misses]
+        self.counts: dict[tuple[int, int], list[int]] = {}
+        CALL_STATS.add(self)
+
+    def record(self, crossings: int, depth: int, hit: bool):
+        counts = self.counts.get((crossings, depth))
+        if counts is None:
+            counts = self.counts[(crossings, depth)] = [0, 0]
+        counts[0 if hit else 1] += 1
+
+    def clear(self):
+        self.counts.clear()
+
+    def stats(self, caches: list[SkeinCache]) -> CacheStats:
+        by_crossings: dict[int, LevelStats] = {}
+        by_depth: dict[int, LevelStats] = {}
+        for (crossings, depth), (hits, misses) in self.counts.items():
+            for levels, level in ((by_crossings, crossings), (by_depth, depth)):
+                stats = levels.setdefault(level, LevelStats())
+                stats.hits += hits
+                stats.misses += misses
+
+        return CacheStats(
+            hits=sum(hits for hits, _ in self.counts.values()),
+            misses=sum(misses for _, misses in self.counts.values()),
+            entries=sum(len(cache) for cache in caches),
+            bytes=sum(cache.info().bytes for cache in caches),
+            by_crossings=dict(sorted(by_crossings.items())),
+            by_depth=dict(sorted(by_depth.items())),
+        )
+
+
+class SpillSegment:
+    """
+    An append-only log on disk for the entries evicted from a `SkeinCache`.
+
+    Each record is the pickled key, value and cost of an entry, the index in
+    memory maps the hash of the key to the offsets of its records. Records are
+    never rewritten: an entry spilled again after being read back is already in
+    the log. The file belongs to the process that wrote it, after a fork the
+    child starts its own, and it is removed on `close()` and at exit.
+    """
+
+    def __init__(self, directory: str, name: str):
+        self.directory = directory
+        self.name = name
+
+        self._file = None
+        self._pid: int | None = None
+        self._index: dict[int, list[tuple[int, int]]] = {}
+        self._entries = 0
+        self._bytes = 0
+
+        atexit.register(self.close)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}-{os.getpid()}.log")
+
+    def _open(self):
+        if self._file is not None and self._pid == os.getpid():
+            return self._file
+
+        # after a fork the parent's log is not ours
+        self._index = {}
+        self._entries = 0
+        self._bytes = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.path, 'w+b')
+        self._pid = os.getpid()
+        return self._file
+
+    def _records(self, key: Hashable):
+        # no record yet (in this process), a miss does not need the file
+        if self._pid != os.getpid() or hash(key) not in self._index:
+            return
+
+        file = self._open()
+        for offset, length in self._index[hash(key)]:
+            file.seek(offset)
+            yield pickle.loads(file.read(length))
+
+    def __contains__(self, key: Hashable) -> bool:
+        return any(record_key == key for record_key, _, _ in self._records(key))
+
+    def __len__(self):
+        return self._entries
+
+    def get(self, key: Hashable) -> tuple[Any, int] | None:
+        """
+        The value and the cost of `key`, if it was spilled.
+        """
+        for record_key, value, cost in self._records(key):
+            if record_key == key:
+                return value, cost
+
+        return None
+
+    def put(self, key: Hashable, value: Any, cost: int):
+        if key in self:
+            return
+
+        record = pickle.dumps((key, value, cost), protocol=pickle.HIGHEST_PROTOCOL)
+        file = self._open()
+        file.seek(0, os.SEEK_END)
+        offset = file.tell()
+        file.write(record)
+
+        self._index.setdefault(hash(key), []).append((offset, len(record)))
+        self._entries += 1
+        self._bytes += len(record)
+
+    def clear(self):
+        if self._file is not None and self._pid == os.getpid():
+            self._file.truncate(0)
+        self._index = {}
+        self._entries = 0
+        self._bytes = 0
+
+    def close(self):
+        if self._file is not None and self._pid == os.getpid():
+            self._file.close()
+            os.remove(self.path)
+        self._file = None
+        self._index = {}
+        self._entries = 0
+        self._bytes = 0
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+
+class SkeinCache:
+    """
+    A memoization cache for the skein recursions with an optional budget on the
+    number of entries and on their (estimated) size in bytes.
+
+    When the budget is exceeded entries are evicted with the GreedyDual-Size
+    policy: each entry has the priority `L + log2(1 + cost) / size`, where the
+    cost is the number of recursive calls it took to compute it and `L` is the
+    priority of the last evicted entry. The entry with the lowest priority goes
+    first, and a hit restores the priority of an entry, so under a fixed budget
+    the results that are expensive for their size survive, and cheap ones age
+    out as `L` grows. Between entries of the same cost and size this is LRU.
+
+    The cost is damped by the logarithm as the expensive results are the large
+    diagrams near the root of the skein tree, which are seldom reused, while
+    the cheap small ones are reused all over it.
+
+    With a `SpillSegment` evicted entries are moved to disk instead of being
+    dropped, and misses in memory fall through to it before recomputing, the
+    entries read back are kept in memory again.
+
+    Instances can be used as decorators in place of `functools.cache`, the
+    decorated function gets the same `cache_clear()` and `cache_info()` and the
+    cost of each result is counted with `call_count()`. While `enabled` is
+    false the decorated function neither reads nor stores results, for when an
+    outer memo already holds them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        spill: SpillSegment | None = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self.enabled = True
+
+        # key -> (value, size, cost, priority, serial)
+        self._entries: dict[Hashable, tuple[Any, int, int, float, int]] = {}
+        # (priority, serial, key), entries whose serial changed are stale
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._serials = itertools.count()
+        self._inflation = 0.0
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+
+        CACHES.add(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _push(self, key: Hashable, value: Any, size: int, cost: int):
+        priority = self._inflation + math.log2(1 + cost) / size
+        serial = next(self._serials)
+        self._entries[key] = (value, size, cost, priority, serial)
+        heapq.heappush(self._heap, (priority, serial, key))
+
+        # drop the stale heap items once they outnumber the live ones
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                (priority, serial, key)
+                for key, (_, _, _, priority, serial) in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            spilled = self.spill.get(key) if self.spill is not None else None
+            if spilled is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self.disk_hits += 1
+            value, cost = spilled
+            self.put(key, value, cost)
+            return value
+
+        self.hits += 1
+        value, size, cost, _, _ = entry
+        self._push(key, value, size, cost)
+        return value
+
+    def put(self, key: Hashable, value: Any, cost: int = 1):
+        """
+        Store `value`, `cost` is the work it would take to compute it again,
+        in recursive calls.
+        """
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+
+        size = estimate_size(key) + estimate_size(value)
+        self._push(key, value, size, max(cost, 1))
+        self._bytes += size
+
+        self._evict()
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            priority, serial, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry[4] != serial:
+                continue
+
+            del self._entries[key]
+            self._bytes -= entry[1]
+            self._inflation = priority
+            self.evictions += 1
+
+            if self.spill is not None:
+                self.spill.put(key, entry[0], entry[2])
+
+    def clear(self):
+        self._entries.clear()
+        self._heap.clear()
+        self._inflation = 0.0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+
+        if self.spill is not None:
+            self.spill.clear()
+
+    def resize(self, max_entries: int | None = None, max_bytes: int | None = None):
+        """
+        Change the budget, evicting entries right away if needed. `None` means
+        no limit.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self._entries),
+            bytes=self._bytes,
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes,
+            disk_hits=self.disk_hits,
+            disk_entries=len(self.spill) if self.spill is not None else 0,
+            disk_bytes=self.spill.bytes if self.spill is not None else 0,
+        )
+
+    @staticmethod
+    def key(*args, **kwargs) -> Hashable:
+        """
+        The key of a call of a decorated function.
+        """
+        return (args, tuple(sorted(kwargs.items()))) if kwargs else args
+
+    def __call__(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        missing = object()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+
+            key = SkeinCache.key(*args, **kwargs)
+
+            result = self.get(key, missing)
+            if result is missing:
+                start = call_count()
+                result = func(*args, **kwargs)
+                self.put(key, result, cost=call_count() - start)
+
+            return result
+
+        wrapper.cache = self
+        wrapper.cache_clear = self.clear
+        wrapper.cache_info = self.info
+        return wrapper
+
+
+# the live caches and statistics of the process, the ones of the recursions
+# live as long as their functions and the others go away with their owners
+CACHES: weakref.WeakSet[SkeinCache] = weakref.WeakSet()
+
+CALL_STATS: weakref.WeakSet[CallStats] = weakref.WeakSet()
+
+
+def clear_caches():
+    """
+    Clear all the skein caches of the process, and their statistics.
+    """
+    for cache in CACHES:
+        cache.clear()
+    for stats in CALL_STATS:
+        stats.clear()
+
+
+def resize_caches(max_entries: int | None = None, max_bytes: int | None = None):
+    """
+    Set the same budget on all the skein caches of the process.
+    """
+    for cache in CACHES:
+        cache.resize(max_entries, max_bytes)
+
+
+def spill_caches(directory: str | None):
+    """
+    Spill the entries evicted from all the skein caches of the process to logs
+    in `directory` (see `SpillSegment`), `None` drops them again.
+    """
+    for k, cache in enumerate(CACHES):
+        if cache.spill is not None:
+            cache.spill.close()
+
+        cache.spill = None if directory is None else SpillSegment(directory, f"skein-{k}")
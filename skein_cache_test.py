@@ -0,0 +1,191 @@
+import gc
+import kauffman
+import pytest
+import weakref
+
+from codes_test import K5_2
+from kauffman import kauffman_polynomial
+from laurent import LaurentPolynomial
+from skein_cache import (
+    CACHES, CacheStats, LevelStats, SkeinCache, SpillSegment, call_count, clear_caches,
+    count_call, estimate_size, resize_caches, spill_caches,
+)
+
+
+@pytest.fixture
+def restore_caches():
+    """
+    Start from empty caches, and put back the budgets and the spill directory
+    of the caches of the recursions when the test is done.
+    """
+    budgets = [(cache, cache.max_entries, cache.max_bytes) for cache in CACHES]
+    clear_caches()
+
+    yield
+
+    spill_caches(None)
+    for cache, max_entries, max_bytes in budgets:
+        cache.resize(max_entries, max_bytes)
+
+
+def test_lru_eviction():
+    cache = SkeinCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    # 'b' was the least recently used
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.info().evictions == 1
+
+
+def test_cost_aware_eviction():
+    cache = SkeinCache(max_entries=2)
+    cache.put('expensive', 1, cost=1000)
+    cache.put('cheap', 2, cost=1)
+
+    # the expensive entry survives although it is the least recently used
+    cache.put('new', 3, cost=1)
+    assert 'expensive' in cache and 'cheap' not in cache
+
+    # cheap entries age out as the inflation grows, expensive ones only later
+    for k in range(10):
+        cache.put(k, k, cost=1)
+    assert 'expensive' in cache
+
+    for k in range(2000):
+        cache.put(k, k, cost=1)
+    assert 'expensive' not in cache
+
+
+def test_byte_budget_and_resize():
+    p = LaurentPolynomial({(i, 0): 1 for i in range(10)})
+    size = estimate_size('k0') + estimate_size(p)
+
+    cache = SkeinCache(max_bytes=3 * size)
+    for k in range(5):
+        cache.put(f'k{k}', p)
+
+    assert len(cache) == 3
+    assert cache.info().bytes <= 3 * size
+
+    cache.resize(max_entries=1)
+    assert len(cache) == 1 and 'k4' in cache
+
+    cache.clear()
+    assert len(cache) == 0 and cache.info().bytes == 0
+
+
+def test_registry_does_not_keep_caches_alive():
+    cache = SkeinCache(max_entries=2)
+    assert cache in CACHES
+
+    ref = weakref.ref(cache)
+    del cache
+    gc.collect()
+    assert ref() is None
+
+
+def test_decorator():
+    calls = []
+
+    @SkeinCache(max_entries=10)
+    def square(x, offset=0):
+        calls.append(x)
+        return x * x + offset
+
+    assert square(3) == 9 and square(3) == 9
+    assert square(3, offset=1) == 10
+    assert calls == [3, 3]
+    assert square.cache_info().hits == 1
+
+
+def test_decorator_counts_recursive_calls():
+    @SkeinCache()
+    def fibonacci(n):
+        count_call()
+        return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+    # computing fibonacci(10) evaluates the body for n = 10, ..., 0
+    fibonacci(10)
+    _, _, cost, _, _ = fibonacci.cache._entries[(10,)]
+    assert cost == 11
+
+
+def test_small_budget_still_correct(restore_caches):
+    expected = kauffman_polynomial(K5_2, backend='sympy')
+
+    resize_caches(max_entries=4)
+    assert kauffman_polynomial(K5_2, backend='laurent') == expected
+    assert sum(cache.info().evictions for cache in CACHES) > 0
+
+
+def test_spill_to_disk(tmp_path):
+    spill = SpillSegment(str(tmp_path), 'test')
+    cache = SkeinCache(max_entries=2, spill=spill)
+
+    # misses before anything is spilled do not create the log
+    assert spill.get('a') is None and 'a' not in spill
+    assert not any(tmp_path.iterdir())
+    p = LaurentPolynomial({(1, 2): 3})
+    cache.put('a', p, cost=5)
+    cache.put('b', 2)
+    cache.put('c', 3)
+
+    assert 'a' not in cache and 'a' in spill
+    assert cache.get('a') == p
+    assert cache.info().disk_hits == 1 and cache.info().misses == 0
+
+    # read back entries are not written again when evicted
+    cache.put('d', 4)
+    cache.put('e', 5)
+    assert len(spill) == 3 and spill.get('a') == (p, 5)
+
+    cache.clear()
+    assert len(spill) == 0 and cache.get('a') is None
+
+    spill.close()
+    assert not any(tmp_path.iterdir())
+
+
+def test_spill_still_correct(tmp_path, restore_caches):
+    expected = kauffman_polynomial(K5_2, backend='sympy')
+
+    spill_caches(str(tmp_path))
+    resize_caches(max_entries=4)
+    for backend in ('laurent', 'deferred'):
+        assert kauffman_polynomial(K5_2, backend=backend) == expected
+    assert sum(cache.info().disk_hits for cache in CACHES) > 0
+
+
+def test_cache_stats(restore_caches):
+    assert kauffman.cache_stats() == CacheStats(entries=0, bytes=0)
+
+    start = call_count()
+    kauffman.kauffman_polynomial(K5_2)
+    first = kauffman.cache_stats()
+
+    assert first.hits + first.misses == call_count() - start
+    assert first.misses > 0 and first.entries > 0 and first.bytes > 0
+    assert first.by_depth[0] == LevelStats(hits=0, misses=1)
+    for levels in (first.by_crossings, first.by_depth):
+        assert sum(level.hits for level in levels.values()) == first.hits
+        assert sum(level.misses for level in levels.values()) == first.misses
+
+    # the second time the root is a hit, and the difference shows it alone
+    kauffman.kauffman_polynomial(K5_2)
+    second = kauffman.cache_stats() - first
+    assert second.hits == 1 and second.misses == 0
+    assert second.by_crossings == {5: LevelStats(hits=1, misses=0)}
+    assert first + second == kauffman.cache_stats()
+
+
+def test_results_are_kept_once(restore_caches):
+    # with the canonical memo the memo of the recursion itself stays empty
+    kauffman.kauffman_polynomial(K5_2)
+    assert kauffman._kauffman_polynomial.cache_stats().entries == len(
+        kauffman._kauffman_polynomial.canonical_cache
+    ) > 0
@@ -55,6 +55,41 @@ def rotate_to_minimal(l):
     return l[min_index:] + l[:min_index]
 
 
+def least_rotations(l) -> list[int]:
+    """
+    Return the indices of all the rotations of `l` that are lexicographically
+    minimal, using Booth's algorithm. There is more than one only when the list
+    is periodic.
+    """
+    n = len(l)
+    if n == 0:
+        return [0]
+
+    # Booth's least rotation on the doubled list
+    doubled = l + l
+    failure = [-1] * (2 * n)
+    k = 0
+    for j in range(1, 2 * n):
+        i = failure[j - k - 1]
+        while i != -1 and doubled[j] != doubled[k + i + 1]:
+            if doubled[j] < doubled[k + i + 1]:
+                k = j - i - 1
+            i = failure[i]
+        if i == -1 and doubled[j] != doubled[k + i + 1]:
+            if doubled[j] < doubled[k + i + 1]:
+                k = j
+            failure[j - k] = -1
+        else:
+            failure[j - k] = i + 1
+
+    # the minimal rotations repeat with the smallest period of the list
+    period = next(
+        p for p in range(1, n + 1)
+        if n % p == 0 and l[p:] + l[:p] == l
+    )
+    return [(k + p) % n for p in range(0, n, period)]
+
+
 def sign_str(n, mode: Literal[None, 'sup', 'sub'] = None):
     SIGN_MAP = {
         None: {1: "+", -1: "-", 0: "0"},
@@ -105,17 +140,17 @@ def log_input_output(func):
     def wrapper(*args, **kwargs):
         global _global_depth, global_debug
 
-        func_name = func.__name__
-        args_repr = [repr(a) for a in args]
-        kwargs_repr = [f"{k}={v!r}" for k, v in kwargs.items()]
-        signature = ", ".join(args_repr + kwargs_repr)
-
         # Prefix for the current function call level
         call_prefix = _global_depth * '│  '
 
         if global_debug:
+            # the arguments are only formatted when they are printed, the
+            # repr of a diagram is not cheap
+            args_repr = [repr(a) for a in args]
+            kwargs_repr = [f"{k}={v!r}" for k, v in kwargs.items()]
+            signature = ", ".join(args_repr + kwargs_repr)
             print(
-                f"{call_prefix}● {func_name}({signature})"
+                f"{call_prefix}● {func.__name__}({signature})"
             )
 
         try:
@@ -123,16 +158,16 @@ def log_input_output(func):
             result = func(*args, **kwargs)
             _global_depth -= 1  # Decrement after function call, back to call_prefix level
 
-            # try to simplify if sympy object
-            new_result = result
-            if hasattr(result, "simplify"):
-                new_result = (
-                    str(result.expand())
-                    .replace("**", "^")
-                    .replace("*", " * ")
-                )
-
             if global_debug:
+                # try to simplify if sympy object
+                new_result = result
+                if hasattr(result, "simplify"):
+                    new_result = (
+                        str(result.expand())
+                        .replace("**", "^")
+                        .replace("*", " * ")
+                    )
+
                 print(
                     f"{call_prefix}└─▶ {new_result}"
                 )